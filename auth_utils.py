@@ -1,8 +1,7 @@
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,11 +11,22 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-it-in-production-12
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7 # 1 week
 
-pwd_context = CryptContext(
-    schemes=["sha256_crypt", "bcrypt"], 
-    deprecated="auto",
-    bcrypt__truncate_error=False
-)
+# passlib and jose (with its cryptography backend) are imported on first use
+# so they stay out of the app's startup time.
+@lru_cache(maxsize=1)
+def pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(
+        schemes=["sha256_crypt", "bcrypt"], 
+        deprecated="auto",
+        bcrypt__truncate_error=False
+    )
+
+def _jose():
+    from jose import JWTError, jwt
+
+    return jwt, JWTError
 
 def verify_password(plain_password, hashed_password):
     try:
@@ -26,7 +36,7 @@ def verify_password(plain_password, hashed_password):
         # We truncate it to 72 to avoid the 500 error and match bcrypt's internal behavior.
         if len(plain_password) > 72:
             plain_password = plain_password[:72]
-        return pwd_context.verify(plain_password, hashed_password)
+        return pwd_context().verify(plain_password, hashed_password)
     except Exception as e:
         # If the hash is invalid or the password causes issues, treat as failure instead of 500
         print(f"Auth error during verification: {e}")
@@ -35,9 +45,10 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     if password and len(password) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    jwt, _ = _jose()
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -48,6 +59,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 def decode_access_token(token: str):
+    jwt, JWTError = _jose()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
@@ -55,16 +67,19 @@ def decode_access_token(token: str):
         return None
 
 def create_password_reset_token(email: str):
+    jwt, _ = _jose()
     expire = datetime.utcnow() + timedelta(hours=24)
     to_encode = {"sub": email, "exp": expire, "type": "password_reset"}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def create_activation_token(email: str):
+    jwt, _ = _jose()
     expire = datetime.utcnow() + timedelta(hours=48)
     to_encode = {"sub": email, "exp": expire, "type": "account_activation"}
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_password_reset_token(token: str) -> Optional[str]:
+    jwt, JWTError = _jose()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         if payload.get("type") != "password_reset":
@@ -74,6 +89,7 @@ def verify_password_reset_token(token: str) -> Optional[str]:
         return None
 
 def verify_activation_token(token: str) -> Optional[str]:
+    jwt, JWTError = _jose()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         if payload.get("type") != "account_activation":
@@ -3,6 +3,9 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from fastapi import Request
+
+from utils import disconnect, query_budget
 
 load_dotenv()
 
@@ -26,13 +29,21 @@ engine = create_engine(
     pool_pre_ping=True,
     pool_recycle=300,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit: handlers return what they just wrote
+# (server-generated values come back through RETURNING) instead of
+# paying a SELECT per object to reload it.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+query_budget.install(engine, SessionLocal)
+disconnect.install(engine, SessionLocal)
 
 Base = declarative_base()
 
 # Dependency for FastAPI
-def get_db():
+def get_db(request: Request):
     db = SessionLocal()
+    query_budget.attach(db, request)
+    disconnect.attach(db, request)
     try:
         yield db
     finally:
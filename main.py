@@ -1,19 +1,22 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Request, File, UploadFile
 # Version: 1.0.2 - SMTP configured
-from sqlalchemy import inspect
-from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 import shutil
 import uuid
 import os
 import logging
 import traceback
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
+from utils import change_feed, compression, disconnect, health, query_budget, ref_cache, warmup
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -24,7 +27,25 @@ UPLOAD_DIR = "uploads"
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("FastAPI starting up...")
+    # Tables come from 'alembic upgrade head', run once per deploy before the
+    # replicas start (preDeployCommand in railway.toml); instead of
+    # create_all, the health monitor checks the schema revision in the
+    # background so startup never waits on the database.
+    health_monitor.start()
+    # Evicts ref_cache entries written by other workers/replicas
+    change_listener.start()
+    # Runs while the app already serves /livez; /readyz stays 503 until done
+    warm_up = asyncio.create_task(warmup.run(app, engine, health_monitor))
+    yield
+    warm_up.cancel()
+    change_listener.stop()
+    health_monitor.stop()
+
 app = FastAPI(
+    lifespan=lifespan,
 
     title="S16 Rugby App Backup Migration API",
     redirect_slashes=True
@@ -44,6 +65,30 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
+# Requests stopped by utils.query_budget: the request spent its query or
+# DB-time allowance and its next statement was refused (a statement_timeout
+# is handled below). Answer 503 so the connection is
+# released instead of the client retrying into a saturated pool.
+@app.exception_handler(query_budget.QueryBudgetExceeded)
+async def query_budget_handler(request: Request, exc: query_budget.QueryBudgetExceeded):
+    logger.warning(f"Query budget exceeded ({exc.reason}) after {exc.state.queries} queries: {query_budget.describe(request)}")
+    return JSONResponse(status_code=503, content={"error": "Query budget exceeded", "detail": exc.reason})
+
+# The client went away and utils.disconnect stopped its queries; nobody
+# will read this response.
+@app.exception_handler(disconnect.ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: disconnect.ClientDisconnected):
+    return Response(status_code=disconnect.CLIENT_CLOSED_REQUEST)
+
+@app.exception_handler(DBAPIError)
+async def statement_timeout_handler(request: Request, exc: DBAPIError):
+    if disconnect.is_disconnected(request):
+        return Response(status_code=disconnect.CLIENT_CLOSED_REQUEST)
+    if not query_budget.is_statement_timeout(exc):
+        return await global_exception_handler(request, exc)
+    logger.warning(f"Statement timeout: {query_budget.describe(request)} sql={exc.statement!r}")
+    return JSONResponse(status_code=503, content={"error": "Query timed out", "detail": "statement_timeout"})
+
 
 # Storage for diagnostic info
 
@@ -57,6 +102,10 @@ from utils import email_utils
 from database import engine, get_db
 from dependencies import verify_role_assignment, verify_family_link_permission, get_current_user
 
+# Background refresher behind /readyz, /health and the diagnostic endpoints
+health_monitor = health.HealthMonitor(engine)
+change_listener = change_feed.ChangeListener(engine)
+
 # Move Upload route here, before routers_auto, for maximum priority
 @app.post("/upload")
 @app.post("/api/v1/upload")
@@ -104,18 +153,27 @@ print("Main.py: All routers included successfully.")
 def ping():
     return JSONResponse(content={"message": "pong"})
 
+# Liveness: the process is up and serving; no I/O at all
+@app.get("/livez")
+@app.get("/api/v1/livez")
+def liveness():
+    return {"status": "ok"}
+
+# Readiness: last background DB check, pool usage and email provider status
+@app.get("/readyz")
+@app.get("/api/v1/readyz")
+def readiness():
+    ready, report = health_monitor.readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=report)
+
 @app.get("/health")
 @app.get("/api/v1/health")
-def health_check(db: Session = Depends(get_db)):
-    db_status = "ok"
-    try:
-        from sqlalchemy import text
-        db.execute(text("SELECT 1"))
-    except Exception as e:
-        db_status = f"error: {str(e)}"
+def health_check():
+    db_status = health_monitor.database["status"]
     return {
         "status": "ok", 
         "database": db_status,
+        "database_checked_at": health_monitor.database.get("checked_at"),
         "startup_error": startup_error,
         "env_port": os.getenv("PORT"),
         "db_resolved": db_status == "ok"
@@ -176,6 +234,7 @@ def reset_all_access(db: Session = Depends(get_db)):
                 results[item["email"]] += f" + Linked to Staff({item['name']})"
     
     db.commit()
+    ref_cache.invalidate(models_auto.Staff)
     return {"status": "success", "updates": results}
 
 @app.get("/debug/error")
@@ -188,17 +247,13 @@ def get_startup_error():
 
 @app.get("/debug/tables")
 @app.get("/api/v1/debug/tables")
-def list_tables(db: Session = Depends(get_db)):
+def list_tables():
     """
-    Diagnostic endpoint to list all tables in the database.
+    Diagnostic endpoint to list all tables in the database (cached by the health monitor).
     """
-    try:
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        return {"tables": tables}
-    except Exception as e:
-        logger.error(f"Error inspecting tables: {e}")
-        return {"error": str(e)}
+    if health_monitor.database["status"] not in ("ok", "unknown"):
+        return {"error": health_monitor.database["status"], **health_monitor.tables}
+    return health_monitor.tables
 
 @app.exception_handler(404)
 async def custom_404_handler(request: Request, exc):
@@ -226,26 +281,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Link", "X-Next-Cursor", "ETag"],
 )
 
 # Middleware for proxy headers (Railway/Vercel)
 app.add_middleware(ProxyHeadersMiddleware, trusted_hosts="*")
+# Cancel the DB work of GET requests whose client has gone away
+app.add_middleware(disconnect.CancelOnDisconnectMiddleware)
+# gzip/br/zstd for JSON responses above COMPRESS_MIN_BYTES
+app.add_middleware(compression.CompressionMiddleware)
 
 # Static Files mount
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 
-@app.on_event("startup")
-def startup_db_check():
-    print("FastAPI starting up...")
-    try:
-        print("Synchronizing database tables...")
-        models.Base.metadata.create_all(bind=engine)
-        print("Database synchronization successful.")
-    except Exception as e:
-        print(f"CRITICAL: Database synchronization failed: {e}")
-        # We don't raise here to allow the app to serve diagnostic endpoints
-
 @app.get("/")
 def read_root():
     return {"message": "S16 Backend API running"}
@@ -304,7 +353,6 @@ def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2Passw
         logger.info(f"Syncing role for {user.email}: {user.role} -> {target_role}")
         user.role = target_role
         db.commit()
-        db.refresh(user)
 
     access_token = auth_utils.create_access_token(data={"sub": user.email, "role": user.role})
     
@@ -449,7 +497,6 @@ def assign_role(
     # 3. Update role
     target_user.role = request.new_role
     db.commit()
-    db.refresh(target_user)
     
     return target_user
 
@@ -506,6 +553,7 @@ def link_user_profile(
         raise HTTPException(status_code=400, detail="Invalid profile type. Must be STAFF or JUGADOR.")
         
     db.commit()
+    ref_cache.invalidate(models_auto.Staff, models_auto.JugadoresPropios)
     return {"message": f"Successfully linked {request.profile_type} profile.", "user_id": str(user.id)}
         
     # Once explicitly linked, we can consider them validated
@@ -690,7 +738,6 @@ def register_user(request: schemas.UserRegisterRequest, db: Session = Depends(ge
     
     db.add(new_user)
     db.commit()
-    db.refresh(new_user)
     
     # Send activation email
     token = auth_utils.create_activation_token(new_user.email)
@@ -724,25 +771,14 @@ def activate_user(token: str, db: Session = Depends(get_db)):
 @app.get("/api/v1/auth/diagnostic")
 def auth_diagnostic():
     import os
-    import socket
     from utils import email_utils
     
-    # Check network connectivity (SMTP is no longer primary, but good to know)
-    net_status = {}
-    for port in [465, 587]:
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(3)
-            result = s.connect_ex(('smtp.gmail.com', port))
-            net_status[f"port_{port}"] = "OPEN" if result == 0 else f"CLOSED (code {result})"
-            s.close()
-        except Exception as e:
-            net_status[f"port_{port}"] = f"ERROR: {e}"
-
+    # Network checks (SMTP is no longer primary) come from the health monitor's last run
     return {
         "status": "online",
         "email_method": "Brevo API",
-        "network_test": net_status,
+        "network_test": health_monitor.email.get("smtp", {}),
+        "email_provider": {k: v for k, v in health_monitor.email.items() if k != "smtp"},
         "brevo": {
             "has_key": bool(email_utils.BREVO_API_KEY),
             "key_prefix": email_utils.BREVO_API_KEY[:5] if email_utils.BREVO_API_KEY else None
@@ -0,0 +1,60 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import text
+
+from database import Base, engine
+# Both model sets share the same declarative Base; importing them registers
+# every table in Base.metadata for autogenerate.
+import models  # noqa: F401
+import models_auto  # noqa: F401
+
+config = context.config
+
+# Arbitrary key for pg_advisory_lock, shared by every 'alembic upgrade' run
+MIGRATION_LOCK_KEY = 0x5316_A1E3
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+    """Emit the SQL to stdout instead of running it (alembic upgrade --sql)."""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # Two runs at once (a retried release step, a manual upgrade during
+            # a deploy) would race on the same CONCURRENTLY builds and data
+            # rewrites: the second waits here, then finds the schema at head.
+            # Session-level, so it outlives the per-revision commits.
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # One transaction per revision so CONCURRENTLY blocks in later
+            # revisions don't leave earlier ones half-applied.
+            transaction_per_migration=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
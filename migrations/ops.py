@@ -0,0 +1,91 @@
+"""
+Shared helpers for revisions that must run online against the live database.
+
+Index builds use CREATE INDEX CONCURRENTLY, which cannot run inside a
+transaction, so callers wrap them in `op.get_context().autocommit_block()`.
+"""
+from alembic import context, op
+from sqlalchemy import text
+
+
+def _drop_if_invalid(name: str):
+    # A cancelled CONCURRENTLY build leaves an INVALID index behind, which
+    # IF NOT EXISTS would silently keep. Drop it so it gets rebuilt.
+    if context.is_offline_mode():
+        return
+    invalid = op.get_bind().execute(
+        text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).first()
+    if invalid:
+        op.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+def create_index_concurrently(name: str, table: str, columns, unique: bool = False, **kw):
+    _drop_if_invalid(name)
+    op.create_index(
+        name,
+        table,
+        columns,
+        unique=unique,
+        if_not_exists=True,
+        postgresql_concurrently=True,
+        **kw,
+    )
+
+
+def drop_index_concurrently(name: str, table: str):
+    op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def add_unique_constraint_concurrently(name: str, table: str, columns):
+    """
+    Builds the backing unique index CONCURRENTLY, then attaches it as a table
+    constraint, which only needs a brief lock instead of a full table scan.
+    """
+    create_index_concurrently(name, table, columns, unique=True)
+    if not context.is_offline_mode():
+        exists = op.get_bind().execute(
+            text("SELECT 1 FROM pg_constraint WHERE conname = :name"), {"name": name}
+        ).first()
+        if exists:
+            return
+    op.execute(text(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" UNIQUE USING INDEX "{name}"'))
+
+
+def drop_unique_constraint(name: str, table: str):
+    op.execute(text(f'ALTER TABLE "{table}" DROP CONSTRAINT IF EXISTS "{name}"'))
+
+
+def replace_foreign_key(name: str, table: str, column: str, ref_table: str, ref_column: str, ondelete: str):
+    """
+    Swaps whatever single-column FK `table.column` has (create_all named them
+    automatically) for `name` with the given ON DELETE action. The new key is
+    added NOT VALID; call `validate_constraint` outside the transaction so the
+    check scan does not hold the exclusive lock.
+    """
+    op.execute(text(f"""
+        DO $$
+        DECLARE fk record;
+        BEGIN
+            FOR fk IN
+                SELECT c.conname FROM pg_constraint c
+                JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+                WHERE c.contype = 'f' AND c.conrelid = '"{table}"'::regclass
+                  AND array_length(c.conkey, 1) = 1 AND a.attname = '{column}'
+            LOOP
+                EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', '{table}', fk.conname);
+            END LOOP;
+        END $$
+    """))
+    op.execute(text(
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" FOREIGN KEY ("{column}") '
+        f'REFERENCES "{ref_table}" ("{ref_column}") ON DELETE {ondelete} NOT VALID'
+    ))
+
+
+def validate_constraint(name: str, table: str):
+    op.execute(text(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT "{name}"'))
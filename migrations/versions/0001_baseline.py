@@ -0,0 +1,345 @@
+"""Baseline schema for models.py and models_auto.py
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+The production tables predate this migration (they were imported from
+Supabase), so every table is created with IF NOT EXISTS: on the live
+database this revision is a no-op, on a fresh database it builds the full
+schema.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+role_enum = postgresql.ENUM("ADMIN", "STAFF", "JUGADOR", "FAMILIA", name="roleenum", create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    role_enum.create(op.get_bind(), checkfirst=True)
+
+    # --- models.py ---
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("role", role_enum, nullable=False),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_pending_validation", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        if_not_exists=True,
+    )
+    op.create_index("ix_users_id", "users", ["id"], if_not_exists=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True, if_not_exists=True)
+
+    op.create_table(
+        "family_players",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("family_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("player_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_family_players_id", "family_players", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "player_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("player_id", sa.String(), sa.ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False),
+        *[
+            sa.Column(name, sa.Integer())
+            for name in (
+                "scrums_won", "scrums_lost", "scrums_stolen",
+                "lineouts_won", "lineouts_lost", "lineouts_stolen",
+                "tackles_made", "tackles_missed",
+                "penalties_conceded", "yellow_cards", "red_cards",
+                "tries", "conversions", "penalty_goals", "drop_goals",
+            )
+        ],
+        if_not_exists=True,
+    )
+    op.create_index("ix_player_stats_id", "player_stats", ["id"], if_not_exists=True)
+
+    # --- models_auto.py ---
+    op.create_table(
+        "rivales",
+        sa.Column("fecha_creacion", sa.DateTime(timezone=True)),
+        sa.Column("id_equipo", sa.String(), primary_key=True),
+        sa.Column("ciudad", sa.String()),
+        sa.Column("escudo", sa.String()),
+        sa.Column("categoria", sa.String()),
+        sa.Column("temporada", sa.String()),
+        sa.Column("nombre_equipo", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "eventos",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("hora", sa.Time(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("fecha", sa.Date()),
+        sa.Column("tipo", sa.String()),
+        sa.Column("estado", sa.String()),
+        sa.Column("observaciones", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "Staff",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("auth_id", sa.String()),
+        sa.Column("fecha_nacimiento", sa.Date()),
+        sa.Column("activo", sa.Boolean()),
+        sa.Column("fecha_alta", sa.Date()),
+        sa.Column("fecha_baja", sa.Date()),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("nombre", sa.String()),
+        sa.Column("apellidos", sa.String()),
+        sa.Column("telefono", sa.String()),
+        sa.Column("motivo_baja", sa.String()),
+        sa.Column("foto_url", sa.String()),
+        sa.Column("direccion", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "jugadores_propios",
+        sa.Column("Usuario", sa.String()),
+        sa.Column("fecha_registro", sa.DateTime(timezone=True)),
+        sa.Column("activo", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("Telefono", sa.String()),
+        sa.Column("fecha_nacimiento", sa.Date()),
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("nombre", sa.String()),
+        sa.Column("apellidos", sa.String()),
+        sa.Column("posiciones", sa.String()),
+        sa.Column("talla", sa.String()),
+        sa.Column("licencia", sa.String()),
+        sa.Column("foto", sa.String()),
+        sa.Column("email", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "familias",
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("id_usuario", sa.String(), primary_key=True),
+        sa.Column("autorizado_recoger", sa.Boolean()),
+        sa.Column("autorizado_urgencias", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("id_familia", sa.String()),
+        sa.Column("contacto_principal", sa.Boolean()),
+        sa.Column("nombre_completo", sa.String()),
+        sa.Column("telefono", sa.String()),
+        sa.Column("parentesco", sa.String()),
+        sa.Column("observaciones", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "jugadores_externos",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("licencia", sa.String()),
+        sa.Column("nombre_completo", sa.String()),
+        sa.Column("ultimo_equipo", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "partidos_externos",
+        sa.Column("ensayos_visitante", sa.Integer()),
+        sa.Column("fecha", sa.Date()),
+        sa.Column("marcador_visitante", sa.Integer()),
+        sa.Column("ensayos_local", sa.Integer()),
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("jornada", sa.Integer()),
+        sa.Column("marcador_local", sa.Integer()),
+        sa.Column("equipo_local", sa.String()),
+        sa.Column("equipo_visitante", sa.String()),
+        sa.Column("competicion", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "entrenamientos",
+        sa.Column("creado_en", sa.DateTime(timezone=True)),
+        sa.Column("actualizado_en", sa.DateTime(timezone=True)),
+        sa.Column("trabajo_separado", sa.String()),
+        sa.Column("id_entrenamiento", sa.String(), primary_key=True),
+        sa.Column("evento", sa.String(), sa.ForeignKey("eventos.id")),
+        sa.Column("trabajo_conjunto", sa.String()),
+        sa.Column("calentamiento", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "partidos",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("es_local", sa.Boolean()),
+        sa.Column("ensayos_local", sa.Integer()),
+        sa.Column("ensayos_visitante", sa.Integer()),
+        sa.Column("jornada", sa.Integer()),
+        sa.Column("marcador_local", sa.Float()),
+        sa.Column("marcador_visitante", sa.Float()),
+        sa.Column("Rival", sa.String(), sa.ForeignKey("rivales.id_equipo")),
+        sa.Column("Evento", sa.String(), sa.ForeignKey("eventos.id")),
+        sa.Column("lugar", sa.String()),
+        sa.Column("observaciones", sa.String()),
+        sa.Column("acta_url", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "convocatoria",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("partido", sa.String()),
+        sa.Column("jugador", sa.String()),
+        sa.Column("numero", sa.Float()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "jugador_familia",
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("id_jugador_hospi", sa.String(), primary_key=True),
+        sa.Column("id_familia", sa.String()),
+        sa.Column("id", sa.String()),
+        sa.Column("convive", sa.Boolean()),
+        sa.Column("prioridad_contacto", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("relacion_jugador", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "asistencia",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("entrenamiento_id", sa.String(), sa.ForeignKey("entrenamientos.id_entrenamiento")),
+        sa.Column("jugador_id", sa.String(), sa.ForeignKey("jugadores_propios.id")),
+        sa.Column("asistencia", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "estadisticas_partido",
+        sa.Column("fecha", sa.Date()),
+        sa.Column("ensayos_local", sa.Integer()),
+        sa.Column("ensayos_visitante", sa.Integer()),
+        sa.Column("jornada", sa.Integer()),
+        sa.Column("acta_procesada", sa.Boolean()),
+        sa.Column("fecha_procesado", sa.DateTime(timezone=True)),
+        sa.Column("marcador_local", sa.Integer()),
+        sa.Column("marcador_visitante", sa.Integer()),
+        sa.Column("partido_id", sa.String(), sa.ForeignKey("partidos.id")),
+        sa.Column("partido_externo_id", sa.String(), sa.ForeignKey("partidos_externos.id")),
+        sa.Column("id", sa.String(), primary_key=True),
+        *[
+            sa.Column(name, sa.Integer())
+            for name in (
+                "posesion_local", "posesion_visitante",
+                "placajes_hechos_local", "placajes_hechos_visitante",
+                "placajes_fallados_local", "placajes_fallados_visitante",
+                "mele_ganada_local", "mele_ganada_visitante",
+                "mele_perdida_local", "mele_perdida_visitante",
+                "touch_ganada_local", "touch_ganada_visitante",
+                "touch_perdida_local", "touch_perdida_visitante",
+            )
+        ],
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "estadisticas_jugador",
+        sa.Column("fue_convocado", sa.Boolean()),
+        sa.Column("partido", sa.String(), sa.ForeignKey("partidos.id")),
+        sa.Column("jugador", sa.String(), sa.ForeignKey("jugadores_propios.id")),
+        sa.Column("partido_externo", sa.String(), sa.ForeignKey("partidos_externos.id")),
+        sa.Column("jugador_externo", sa.String()),
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("dorsal", sa.Integer()),
+        sa.Column("ensayos", sa.Integer()),
+        sa.Column("transformaciones", sa.Integer()),
+        sa.Column("penales", sa.Integer()),
+        sa.Column("drops", sa.Integer()),
+        sa.Column("tarjetas_amarillas", sa.Integer()),
+        sa.Column("tarjetas_rojas", sa.Integer()),
+        sa.Column("es_capitan", sa.Boolean()),
+        sa.Column("es_titular", sa.Boolean()),
+        sa.Column("minutos_jugados", sa.Integer()),
+        sa.Column("equipo", sa.String()),
+        sa.Column("licencia", sa.String()),
+        sa.Column("nombre", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "analisis_partido",
+        sa.Column("raw_json", sa.String()),
+        sa.Column("partido_id", sa.String(), sa.ForeignKey("partidos.id")),
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("video_offset_sec", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("evento_id", sa.String(), sa.ForeignKey("eventos.id")),
+        sa.Column("partido_externo_id", sa.String(), sa.ForeignKey("partidos_externos.id")),
+        sa.Column("video_url", sa.String()),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "pruebas_fisicas",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("jugador_id", sa.String(), sa.ForeignKey("jugadores_propios.id")),
+        sa.Column("fecha", sa.Date()),
+        sa.Column("velocidad_10m", sa.Float()),
+        sa.Column("velocidad_10m_2", sa.Float()),
+        sa.Column("velocidad_30m", sa.Float()),
+        sa.Column("velocidad_30m_2", sa.Float()),
+        sa.Column("velocidad_80m", sa.Float()),
+        sa.Column("velocidad_80m_2", sa.Float()),
+        sa.Column("broncotest", sa.String()),
+        sa.Column("broncotest_20m", sa.String()),
+        sa.Column("course_navette", sa.Float()),
+        sa.Column("salto_sj", sa.Float()),
+        sa.Column("salto_sj_2", sa.Float()),
+        sa.Column("salto_cmj", sa.Float()),
+        sa.Column("salto_cmj_2", sa.Float()),
+        sa.Column("salto_rebote", sa.Float()),
+        sa.Column("salto_rebote_2", sa.Float()),
+        sa.Column("salto_horizontal", sa.Float()),
+        sa.Column("salto_horizontal_2", sa.Float()),
+        sa.Column("sentadillas_1m", sa.Integer()),
+        sa.Column("flexiones", sa.Integer()),
+        sa.Column("lanzamiento_pecho", sa.Float()),
+        sa.Column("lanzamiento_pecho_2", sa.Float()),
+        sa.Column("lanzamiento_encima_cabeza", sa.Float()),
+        sa.Column("lanzamiento_encima_cabeza_2", sa.Float()),
+        sa.Column("plancha", sa.String()),
+        sa.Column("abdominales", sa.Integer()),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The baseline describes data imported from Supabase; refusing to drop it
+    # is safer than providing a one-command way to wipe production.
+    raise RuntimeError("The baseline revision cannot be downgraded.")
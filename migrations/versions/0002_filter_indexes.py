@@ -0,0 +1,58 @@
+"""Index foreign keys, list filters and keyset sort keys
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+Covers every column routers_auto filters on, plus the (fecha, id) sort keys
+used by cursor pagination. All indexes are built CONCURRENTLY so the tables
+stay writable while the migration runs.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations.ops import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_asistencia_entrenamiento_id", "asistencia", ["entrenamiento_id"]),
+    ("ix_asistencia_jugador_id", "asistencia", ["jugador_id"]),
+    ("ix_estadisticas_jugador_partido", "estadisticas_jugador", ["partido"]),
+    ("ix_estadisticas_jugador_partido_externo", "estadisticas_jugador", ["partido_externo"]),
+    ("ix_estadisticas_jugador_jugador", "estadisticas_jugador", ["jugador"]),
+    ("ix_estadisticas_partido_partido_id", "estadisticas_partido", ["partido_id"]),
+    ("ix_estadisticas_partido_partido_externo_id", "estadisticas_partido", ["partido_externo_id"]),
+    ("ix_estadisticas_partido_fecha_id", "estadisticas_partido", ["fecha", "id"]),
+    ("ix_analisis_partido_partido_id", "analisis_partido", ["partido_id"]),
+    ("ix_analisis_partido_partido_externo_id", "analisis_partido", ["partido_externo_id"]),
+    ("ix_analisis_partido_evento_id", "analisis_partido", ["evento_id"]),
+    ("ix_partidos_Evento", "partidos", ["Evento"]),
+    ("ix_partidos_Rival", "partidos", ["Rival"]),
+    ("ix_partidos_externos_fecha_id", "partidos_externos", ["fecha", "id"]),
+    ("ix_entrenamientos_evento", "entrenamientos", ["evento"]),
+    ("ix_eventos_fecha_id", "eventos", ["fecha", "id"]),
+    ("ix_pruebas_fisicas_jugador_id", "pruebas_fisicas", ["jugador_id"]),
+    ("ix_pruebas_fisicas_fecha_id", "pruebas_fisicas", ["fecha", "id"]),
+    ("ix_jugadores_propios_email", "jugadores_propios", ["email"]),
+    ("ix_jugadores_externos_licencia", "jugadores_externos", ["licencia"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            create_index_concurrently(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            drop_index_concurrently(name, table)
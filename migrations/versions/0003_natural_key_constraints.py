@@ -0,0 +1,141 @@
+"""Unique natural keys for the upserting writers
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+The create endpoints used to SELECT then INSERT/UPDATE, which raced under
+concurrent acta submissions and left duplicates behind. Before the keys can
+be enforced those duplicates are collapsed: for each natural key the most
+recently created row (created_at, then id, so the choice is deterministic)
+is kept, and rows pointing at a removed partido/jugador externo are
+re-pointed at the survivor. A blank licencia means "no licencia", as in
+create_jugador_externo, so it is turned into NULL first instead of merging
+every unlicensed player into one.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.ops import (
+    add_unique_constraint_concurrently,
+    create_index_concurrently,
+    drop_index_concurrently,
+    drop_unique_constraint,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINTS = [
+    ("uq_asistencia_entrenamiento_jugador", "asistencia", ["entrenamiento_id", "jugador_id"]),
+    ("uq_partidos_externos_fecha_equipos", "partidos_externos", ["fecha", "equipo_local", "equipo_visitante"]),
+    ("uq_estadisticas_partido_partido_id", "estadisticas_partido", ["partido_id"]),
+    ("uq_estadisticas_partido_partido_externo_id", "estadisticas_partido", ["partido_externo_id"]),
+    ("uq_analisis_partido_partido_id", "analisis_partido", ["partido_id"]),
+    ("uq_analisis_partido_partido_externo_id", "analisis_partido", ["partido_externo_id"]),
+    ("uq_pruebas_fisicas_jugador_fecha", "pruebas_fisicas", ["jugador_id", "fecha"]),
+    ("uq_jugadores_externos_licencia", "jugadores_externos", ["licencia"]),
+]
+
+# Mirrors the lookup create_estadisticas_jugador used to do: the match is
+# partido or partido_externo, the player is jugador, jugador_externo,
+# licencia or nombre (first one present).
+ESTADISTICAS_JUGADOR_KEY = (
+    "uq_estadisticas_jugador_natural_key",
+    "estadisticas_jugador",
+    [
+        sa.text("COALESCE(partido, partido_externo)"),
+        sa.text("COALESCE(jugador, jugador_externo, licencia, nombre)"),
+    ],
+)
+
+# Plain indexes from 0002 whose columns now lead a unique index.
+SUPERSEDED_INDEXES = [
+    ("ix_asistencia_entrenamiento_id", "asistencia", ["entrenamiento_id"]),
+    ("ix_estadisticas_partido_partido_id", "estadisticas_partido", ["partido_id"]),
+    ("ix_estadisticas_partido_partido_externo_id", "estadisticas_partido", ["partido_externo_id"]),
+    ("ix_analisis_partido_partido_id", "analisis_partido", ["partido_id"]),
+    ("ix_analisis_partido_partido_externo_id", "analisis_partido", ["partido_externo_id"]),
+    ("ix_pruebas_fisicas_jugador_id", "pruebas_fisicas", ["jugador_id"]),
+    ("ix_jugadores_externos_licencia", "jugadores_externos", ["licencia"]),
+]
+
+
+def _merge_duplicates(table: str, keys, references):
+    """Deletes duplicate parents after re-pointing `references` (table, column) to the kept row."""
+    not_null = " AND ".join(f"{k} IS NOT NULL" for k in keys)
+    op.execute(f"""
+        CREATE TEMP TABLE _duplicates ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY {", ".join(keys)} ORDER BY created_at DESC NULLS LAST, id
+            ) AS keep_id
+            FROM {table} WHERE {not_null}
+        ) ranked
+        WHERE id <> keep_id
+    """)
+    for ref_table, ref_column in references:
+        op.execute(f"""
+            UPDATE {ref_table} SET {ref_column} = d.keep_id
+            FROM _duplicates d WHERE {ref_table}.{ref_column} = d.id
+        """)
+    op.execute(f"DELETE FROM {table} USING _duplicates d WHERE {table}.id = d.id")
+    op.execute("DROP TABLE _duplicates")
+
+
+def _delete_duplicates(table: str, key_expressions):
+    """Keeps one row per key; `{t}` in each expression is replaced by the row alias."""
+    a = ", ".join(e.format(t="a") for e in key_expressions)
+    b = ", ".join(e.format(t="b") for e in key_expressions)
+    op.execute(f"DELETE FROM {table} a USING {table} b WHERE ({a}) = ({b}) AND a.ctid < b.ctid")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _merge_duplicates(
+        "partidos_externos",
+        ["fecha", "equipo_local", "equipo_visitante"],
+        [
+            ("estadisticas_partido", "partido_externo_id"),
+            ("estadisticas_jugador", "partido_externo"),
+            ("analisis_partido", "partido_externo_id"),
+        ],
+    )
+    op.execute("UPDATE jugadores_externos SET licencia = NULL WHERE btrim(licencia) = ''")
+    _merge_duplicates("jugadores_externos", ["licencia"], [("estadisticas_jugador", "jugador_externo")])
+
+    _delete_duplicates("asistencia", ["{t}.entrenamiento_id", "{t}.jugador_id"])
+    _delete_duplicates("estadisticas_partido", ["{t}.partido_id"])
+    _delete_duplicates("estadisticas_partido", ["{t}.partido_externo_id"])
+    _delete_duplicates("analisis_partido", ["{t}.partido_id"])
+    _delete_duplicates("analisis_partido", ["{t}.partido_externo_id"])
+    _delete_duplicates("pruebas_fisicas", ["{t}.jugador_id", "{t}.fecha"])
+    _delete_duplicates(
+        "estadisticas_jugador",
+        [
+            "COALESCE({t}.partido, {t}.partido_externo)",
+            "COALESCE({t}.jugador, {t}.jugador_externo, {t}.licencia, {t}.nombre)",
+        ],
+    )
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in CONSTRAINTS:
+            add_unique_constraint_concurrently(name, table, columns)
+        create_index_concurrently(*ESTADISTICAS_JUGADOR_KEY, unique=True)
+        for name, table, _ in SUPERSEDED_INDEXES:
+            drop_index_concurrently(name, table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED_INDEXES:
+            create_index_concurrently(name, table, columns)
+        drop_index_concurrently(*ESTADISTICAS_JUGADOR_KEY[:2])
+    for name, table, _ in reversed(CONSTRAINTS):
+        drop_unique_constraint(name, table)
@@ -0,0 +1,45 @@
+"""ON DELETE SET NULL for the keys the ORM used to null out
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Deleting a jugador propio or partido externo used to load its dependent
+statistics and set their reference to NULL row by row. The delete endpoints
+now issue a single DELETE, so the database does the same through the FK.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations.ops import replace_foreign_key, validate_constraint
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEYS = [
+    ("fk_estadisticas_jugador_jugador", "estadisticas_jugador", "jugador", "jugadores_propios", "id"),
+    ("fk_estadisticas_jugador_partido_externo", "estadisticas_jugador", "partido_externo", "partidos_externos", "id"),
+    ("fk_estadisticas_partido_partido_externo_id", "estadisticas_partido", "partido_externo_id", "partidos_externos", "id"),
+]
+
+
+def _replace(ondelete: str):
+    for fk in FOREIGN_KEYS:
+        replace_foreign_key(*fk, ondelete=ondelete)
+    with op.get_context().autocommit_block():
+        for name, table, *_ in FOREIGN_KEYS:
+            validate_constraint(name, table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace("SET NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace("NO ACTION")
@@ -0,0 +1,46 @@
+"""ON DELETE CASCADE from matches to their statistics and analysis
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Statistics and analysis rows have no meaning without their match. Deleting a
+partido (or a partido externo's analysis) now removes them in the same
+statement instead of failing on the foreign key.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations.ops import replace_foreign_key, validate_constraint
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEYS = [
+    ("fk_estadisticas_partido_partido_id", "estadisticas_partido", "partido_id", "partidos", "id"),
+    ("fk_estadisticas_jugador_partido", "estadisticas_jugador", "partido", "partidos", "id"),
+    ("fk_analisis_partido_partido_id", "analisis_partido", "partido_id", "partidos", "id"),
+    ("fk_analisis_partido_partido_externo_id", "analisis_partido", "partido_externo_id", "partidos_externos", "id"),
+]
+
+
+def _replace(ondelete: str):
+    for fk in FOREIGN_KEYS:
+        replace_foreign_key(*fk, ondelete=ondelete)
+    with op.get_context().autocommit_block():
+        for name, table, *_ in FOREIGN_KEYS:
+            validate_constraint(name, table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _replace("CASCADE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace("NO ACTION")
@@ -0,0 +1,76 @@
+"""Unique (fecha, hora) per event and one partido/entrenamiento per event
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+crear_o_actualizar_evento now upserts on these keys instead of looking the
+rows up first. Unlike 0003 nothing is merged automatically: duplicated
+events carry their own partido, estadisticas and asistencia, so the
+revision stops and lists the offending keys for a manual clean-up.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+from sqlalchemy import text
+
+from migrations.ops import (
+    add_unique_constraint_concurrently,
+    create_index_concurrently,
+    drop_index_concurrently,
+    drop_unique_constraint,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINTS = [
+    ("uq_eventos_fecha_hora", "eventos", ["fecha", "hora"]),
+    ("uq_partidos_evento", "partidos", ["Evento"]),
+    ("uq_entrenamientos_evento", "entrenamientos", ["evento"]),
+]
+
+# Plain indexes from 0002 now covered by the unique ones.
+SUPERSEDED_INDEXES = [
+    ("ix_partidos_Evento", "partidos", ["Evento"]),
+    ("ix_entrenamientos_evento", "entrenamientos", ["evento"]),
+]
+
+
+def _check_duplicates():
+    if context.is_offline_mode():
+        return
+    bind = op.get_bind()
+    problems = []
+    for _, table, columns in CONSTRAINTS:
+        cols = ", ".join(f'"{c}"' for c in columns)
+        not_null = " AND ".join(f'"{c}" IS NOT NULL' for c in columns)
+        rows = bind.execute(text(
+            f'SELECT {cols}, count(*) FROM "{table}" WHERE {not_null} '
+            f"GROUP BY {cols} HAVING count(*) > 1 LIMIT 20"
+        )).all()
+        problems += [f"{table} {tuple(row[:-1])}: {row[-1]} rows" for row in rows]
+    if problems:
+        raise RuntimeError("Duplicated event keys, clean them up before upgrading:\n" + "\n".join(problems))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _check_duplicates()
+    with op.get_context().autocommit_block():
+        for name, table, columns in CONSTRAINTS:
+            add_unique_constraint_concurrently(name, table, columns)
+        for name, table, _ in SUPERSEDED_INDEXES:
+            drop_index_concurrently(name, table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in SUPERSEDED_INDEXES:
+            create_index_concurrently(name, table, columns)
+    for name, table, _ in reversed(CONSTRAINTS):
+        drop_unique_constraint(name, table)
@@ -0,0 +1,92 @@
+"""Store analisis_partido.raw_json gzip-compressed, with an ETag
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+raw_json was a plain text column returned in every analisis and calendar
+response. It moves to raw_json_gz (bytea, gzip of the compact JSON, as
+utils.json_blob writes it) plus raw_json_etag, and is served only by
+GET /analisis_partido/{id}/raw_json. Existing rows are compressed in
+batches from Python, so the revision has to run online.
+"""
+import gzip
+import hashlib
+import json
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 100
+
+analisis = sa.table(
+    "analisis_partido",
+    sa.column("id", sa.String),
+    sa.column("raw_json", sa.String),
+    sa.column("raw_json_gz", sa.LargeBinary),
+    sa.column("raw_json_etag", sa.String),
+)
+
+
+def _require_online():
+    if context.is_offline_mode():
+        raise RuntimeError("0007 rewrites raw_json from Python and cannot be rendered as SQL; run it online")
+
+
+def _rewrite(source, convert):
+    """Fills the other representation for every row with `source` set, BATCH_SIZE rows at a time."""
+    bind = op.get_bind()
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.select(analisis.c.id, source)
+            .where(source.isnot(None), analisis.c.id > last_id)
+            .order_by(analisis.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            return
+        for row_id, value in rows:
+            bind.execute(analisis.update().where(analisis.c.id == row_id).values(**convert(value)))
+        last_id = rows[-1][0]
+
+
+def _compress(raw):
+    # Frozen copy of utils.json_blob.pack at this revision, so later changes
+    # to the app code cannot change what the migration writes
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        value = raw
+    body = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+    return {
+        "raw_json_gz": gzip.compress(body, compresslevel=6, mtime=0),
+        "raw_json_etag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _require_online()
+    op.add_column("analisis_partido", sa.Column("raw_json_gz", sa.LargeBinary()))
+    op.add_column("analisis_partido", sa.Column("raw_json_etag", sa.String()))
+    # Already gzipped: keep it out of line but skip TOAST's own compression
+    op.execute('ALTER TABLE "analisis_partido" ALTER COLUMN "raw_json_gz" SET STORAGE EXTERNAL')
+    _rewrite(analisis.c.raw_json, _compress)
+    op.drop_column("analisis_partido", "raw_json")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _require_online()
+    op.add_column("analisis_partido", sa.Column("raw_json", sa.String()))
+    _rewrite(analisis.c.raw_json_gz, lambda gz: {"raw_json": gzip.decompress(gz).decode()})
+    op.drop_column("analisis_partido", "raw_json_etag")
+    op.drop_column("analisis_partido", "raw_json_gz")
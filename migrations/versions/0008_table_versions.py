@@ -0,0 +1,83 @@
+"""Per-table write counters for conditional GETs
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+A statement-level trigger on every API table bumps its row in
+table_versions on INSERT, UPDATE, DELETE or TRUNCATE, whoever writes
+(endpoints, scripts, manual SQL). utils.etag builds response ETags from
+these counters, so an unchanged table is answered with 304 without
+querying it. Writers to the same table now queue on its counter row until
+they commit, which is negligible at this write rate.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = [
+    "asistencia",
+    "estadisticas_partido",
+    "entrenamientos",
+    "rivales",
+    "Staff",
+    "jugadores_propios",
+    "familias",
+    "jugadores_externos",
+    "eventos",
+    "partidos",
+    "partidos_externos",
+    "convocatoria",
+    "jugador_familia",
+    "estadisticas_jugador",
+    "analisis_partido",
+    "pruebas_fisicas",
+]
+
+BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def _trigger(table: str) -> str:
+    return f"trg_{table.lower()}_version"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "table_versions",
+        sa.Column("table_name", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute(BUMP_FUNCTION)
+    for table in TRACKED_TABLES:
+        op.execute(
+            f'CREATE TRIGGER {_trigger(table)} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}" '
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+    op.bulk_insert(
+        sa.table("table_versions", sa.column("table_name", sa.String), sa.column("version", sa.BigInteger)),
+        [{"table_name": table, "version": 1} for table in TRACKED_TABLES],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TRACKED_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {_trigger(table)} ON "{table}"')
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table("table_versions")
@@ -0,0 +1,55 @@
+"""Announce table_versions bumps with NOTIFY
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+bump_table_version() now also sends pg_notify('table_changes',
+'<table>:<version>'), delivered at commit, so every API process can drop
+its cached copy of a table another process wrote (utils.change_feed).
+The triggers from 0008 are unchanged; only the function body is replaced.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTIFYING_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    new_version bigint;
+BEGIN
+    INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1
+    RETURNING version INTO new_version;
+    PERFORM pg_notify('table_changes', TG_TABLE_NAME || ':' || new_version);
+    RETURN NULL;
+END
+$$
+"""
+
+# As created by 0008
+PLAIN_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(NOTIFYING_FUNCTION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(PLAIN_FUNCTION)
@@ -0,0 +1,113 @@
+"""Drop the table_versions counters; triggers only NOTIFY
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+
+The 0008 counters made every write statement upsert its table's row in
+table_versions and hold that row lock until commit: writers to a table
+queued behind one row, and transactions writing several tables (eventos
+with partidos/entrenamientos, the acta bulk, borrar_datos_partido) could
+take those locks in different orders and deadlock.
+
+utils.etag now reads the lock-free write counters Postgres already keeps in
+pg_stat_user_tables, and utils.ref_cache hashes the rows it loads, so the
+counters and their table are dropped. The statement triggers stay, but only
+send pg_notify('table_changes', '<table>'), which takes no row locks.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# As in 0008
+TRACKED_TABLES = [
+    "asistencia",
+    "estadisticas_partido",
+    "entrenamientos",
+    "rivales",
+    "Staff",
+    "jugadores_propios",
+    "familias",
+    "jugadores_externos",
+    "eventos",
+    "partidos",
+    "partidos_externos",
+    "convocatoria",
+    "jugador_familia",
+    "estadisticas_jugador",
+    "analisis_partido",
+    "pruebas_fisicas",
+]
+
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify('table_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END
+$$
+"""
+
+# As created by 0009
+BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    new_version bigint;
+BEGIN
+    INSERT INTO table_versions (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_versions.version + 1
+    RETURNING version INTO new_version;
+    PERFORM pg_notify('table_changes', TG_TABLE_NAME || ':' || new_version);
+    RETURN NULL;
+END
+$$
+"""
+
+
+def _trigger(table: str) -> str:
+    return f"trg_{table.lower()}_version"
+
+
+def _notify_trigger(table: str) -> str:
+    return f"trg_{table.lower()}_notify"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(NOTIFY_FUNCTION)
+    for table in TRACKED_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {_trigger(table)} ON "{table}"')
+        op.execute(
+            f'CREATE TRIGGER {_notify_trigger(table)} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}" '
+            "FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change()"
+        )
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table("table_versions")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table(
+        "table_versions",
+        sa.Column("table_name", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.execute(BUMP_FUNCTION)
+    for table in TRACKED_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {_notify_trigger(table)} ON "{table}"')
+        op.execute(
+            f'CREATE TRIGGER {_trigger(table)} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}" '
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+    op.bulk_insert(
+        sa.table("table_versions", sa.column("table_name", sa.String), sa.column("version", sa.BigInteger)),
+        [{"table_name": table, "version": 1} for table in TRACKED_TABLES],
+    )
+    op.execute("DROP FUNCTION IF EXISTS notify_table_change()")
@@ -0,0 +1,120 @@
+"""Undated external matches: NULLS NOT DISTINCT natural key
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+
+The SELECT-then-write create_partido_externo matched an existing row with
+`fecha IS NULL` (and likewise for missing teams). The ON CONFLICT upsert
+from 0003 never does, since a unique constraint treats NULLs as distinct,
+so re-posting an undated match inserted a duplicate. The constraint is
+rebuilt NULLS NOT DISTINCT (Postgres 15+), after merging the duplicates
+left behind as 0003 did: the most recently created row is kept, references
+are re-pointed to it, and where the kept match already has its own
+estadisticas_partido / analisis_partido / player line, the duplicate's copy
+is dropped.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+from migrations.ops import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, Sequence[str], None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NAME = "uq_partidos_externos_fecha_equipos"
+TABLE = "partidos_externos"
+COLUMNS = ["fecha", "equipo_local", "equipo_visitante"]
+NEW_INDEX = f"{NAME}_new"
+
+# Same identity as the estadisticas_jugador natural key from 0003
+PLAYER = "COALESCE({t}.jugador, {t}.jugador_externo, {t}.licencia, {t}.nombre)"
+
+
+def _require_pg15():
+    if context.is_offline_mode():
+        return
+    version = op.get_bind().exec_driver_sql("SHOW server_version_num").scalar()
+    if int(version) < 150000:
+        raise RuntimeError("0011 needs Postgres 15+ for NULLS NOT DISTINCT")
+
+
+def _merge_undated_duplicates():
+    op.execute(f"""
+        CREATE TEMP TABLE _duplicates ON COMMIT DROP AS
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (
+                PARTITION BY {", ".join(COLUMNS)} ORDER BY created_at DESC NULLS LAST, id
+            ) AS keep_id
+            FROM {TABLE} WHERE {" OR ".join(f"{c} IS NULL" for c in COLUMNS)}
+        ) ranked
+        WHERE id <> keep_id
+    """)
+    # One row per match: keep the survivor's own, else one of the duplicates'
+    for ref_table, ref_column in (("estadisticas_partido", "partido_externo_id"), ("analisis_partido", "partido_externo_id")):
+        op.execute(f"""
+            DELETE FROM {ref_table} r USING _duplicates d
+            WHERE r.{ref_column} = d.id
+              AND EXISTS (SELECT 1 FROM {ref_table} k WHERE k.{ref_column} = d.keep_id)
+        """)
+        op.execute(f"""
+            DELETE FROM {ref_table} a USING {ref_table} b, _duplicates da, _duplicates db
+            WHERE a.{ref_column} = da.id AND b.{ref_column} = db.id
+              AND da.keep_id = db.keep_id AND a.ctid < b.ctid
+        """)
+    # Player lines keyed by partido_externo (partido NULL): one per player and match
+    op.execute(f"""
+        DELETE FROM estadisticas_jugador r USING _duplicates d
+        WHERE r.partido IS NULL AND r.partido_externo = d.id
+          AND EXISTS (
+              SELECT 1 FROM estadisticas_jugador k
+              WHERE COALESCE(k.partido, k.partido_externo) = d.keep_id
+                AND {PLAYER.format(t="k")} = {PLAYER.format(t="r")}
+          )
+    """)
+    op.execute(f"""
+        DELETE FROM estadisticas_jugador a USING estadisticas_jugador b, _duplicates da, _duplicates db
+        WHERE a.partido IS NULL AND b.partido IS NULL
+          AND a.partido_externo = da.id AND b.partido_externo = db.id
+          AND da.keep_id = db.keep_id
+          AND {PLAYER.format(t="a")} = {PLAYER.format(t="b")} AND a.ctid < b.ctid
+    """)
+    for ref_table, ref_column in (
+        ("estadisticas_partido", "partido_externo_id"),
+        ("estadisticas_jugador", "partido_externo"),
+        ("analisis_partido", "partido_externo_id"),
+    ):
+        op.execute(f"""
+            UPDATE {ref_table} SET {ref_column} = d.keep_id
+            FROM _duplicates d WHERE {ref_table}.{ref_column} = d.id
+        """)
+    op.execute(f"DELETE FROM {TABLE} USING _duplicates d WHERE {TABLE}.id = d.id")
+    op.execute("DROP TABLE _duplicates")
+
+
+def _swap_constraint():
+    """Replaces the constraint with NEW_INDEX, under the same name."""
+    op.execute(f'ALTER TABLE "{TABLE}" DROP CONSTRAINT IF EXISTS "{NAME}"')
+    op.execute(f'ALTER INDEX "{NEW_INDEX}" RENAME TO "{NAME}"')
+    op.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{NAME}" UNIQUE USING INDEX "{NAME}"')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _require_pg15()
+    _merge_undated_duplicates()
+    with op.get_context().autocommit_block():
+        create_index_concurrently(NEW_INDEX, TABLE, COLUMNS, unique=True, postgresql_nulls_not_distinct=True)
+    _swap_constraint()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        drop_index_concurrently(NEW_INDEX, TABLE)
+        create_index_concurrently(NEW_INDEX, TABLE, COLUMNS, unique=True)
+    _swap_constraint()
@@ -33,6 +33,9 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Fetch created_at/updated_at with RETURNING on the INSERT/UPDATE itself
+    __mapper_args__ = {"eager_defaults": True}
+
     # Relationships
     stats = relationship("PlayerStats", back_populates="player", uselist=False, cascade="all, delete-orphan")
     
@@ -1,13 +1,14 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Time, Float, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Time, Float, JSON, ForeignKey, Index, LargeBinary, UniqueConstraint, func
+from sqlalchemy.orm import deferred, relationship
 from database import Base
 import uuid
 
 class Asistencia(Base):
     __tablename__ = "asistencia"
+    __table_args__ = (UniqueConstraint("entrenamiento_id", "jugador_id", name="uq_asistencia_entrenamiento_jugador"),)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     entrenamiento_id = Column(String, ForeignKey("entrenamientos.id_entrenamiento"))
-    jugador_id = Column(String, ForeignKey("jugadores_propios.id"))
+    jugador_id = Column(String, ForeignKey("jugadores_propios.id"), index=True)
     asistencia = Column(String)
 
     # Relaciones
@@ -16,6 +17,11 @@ class Asistencia(Base):
 
 class EstadisticasPartido(Base):
     __tablename__ = "estadisticas_partido"
+    __table_args__ = (
+        Index("ix_estadisticas_partido_fecha_id", "fecha", "id"),
+        UniqueConstraint("partido_id", name="uq_estadisticas_partido_partido_id"),
+        UniqueConstraint("partido_externo_id", name="uq_estadisticas_partido_partido_externo_id"),
+    )
     fecha = Column(Date)
     ensayos_local = Column(Integer)
     ensayos_visitante = Column(Integer)
@@ -24,8 +30,11 @@ class EstadisticasPartido(Base):
     fecha_procesado = Column(DateTime(timezone=True))
     marcador_local = Column(Integer)
     marcador_visitante = Column(Integer)
-    partido_id = Column(String, ForeignKey("partidos.id"))
-    partido_externo_id = Column(String, ForeignKey("partidos_externos.id"))
+    partido_id = Column(String, ForeignKey("partidos.id", name="fk_estadisticas_partido_partido_id", ondelete="CASCADE"))
+    partido_externo_id = Column(
+        String,
+        ForeignKey("partidos_externos.id", name="fk_estadisticas_partido_partido_externo_id", ondelete="SET NULL"),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
 
     # Advanced Metrics
@@ -49,6 +58,7 @@ class EstadisticasPartido(Base):
 
 class Entrenamientos(Base):
     __tablename__ = "entrenamientos"
+    __table_args__ = (UniqueConstraint("evento", name="uq_entrenamientos_evento"),)
     creado_en = Column(DateTime(timezone=True))
     actualizado_en = Column(DateTime(timezone=True))
     trabajo_separado = Column(String)
@@ -105,9 +115,10 @@ class JugadoresPropios(Base):
     talla = Column(String)
     licencia = Column(String)
     foto = Column(String)
-    email = Column(String)
+    email = Column(String, index=True)
 
-    estadisticas_jugador = relationship("EstadisticasJugador", back_populates="jugador_ref")
+    # The FK nulls the reference on delete; no need to load the rows first
+    estadisticas_jugador = relationship("EstadisticasJugador", back_populates="jugador_ref", passive_deletes=True)
 
 class Familias(Base):
     __tablename__ = "familias"
@@ -125,6 +136,7 @@ class Familias(Base):
 
 class JugadoresExternos(Base):
     __tablename__ = "jugadores_externos"
+    __table_args__ = (UniqueConstraint("licencia", name="uq_jugadores_externos_licencia"),)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     created_at = Column(DateTime(timezone=True))
     licencia = Column(String)
@@ -133,6 +145,10 @@ class JugadoresExternos(Base):
 
 class Eventos(Base):
     __tablename__ = "eventos"
+    __table_args__ = (
+        Index("ix_eventos_fecha_id", "fecha", "id"),
+        UniqueConstraint("fecha", "hora", name="uq_eventos_fecha_hora"),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     hora = Column(Time(timezone=True))
     created_at = Column(DateTime(timezone=True))
@@ -149,6 +165,7 @@ class Eventos(Base):
 
 class Partidos(Base):
     __tablename__ = "partidos"
+    __table_args__ = (UniqueConstraint("Evento", name="uq_partidos_evento"),)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     es_local = Column(Boolean)
     ensayos_local = Column(Integer)
@@ -156,7 +173,7 @@ class Partidos(Base):
     jornada = Column(Integer)
     marcador_local = Column(Float)
     marcador_visitante = Column(Float)
-    Rival = Column(String, ForeignKey("rivales.id_equipo"))
+    Rival = Column(String, ForeignKey("rivales.id_equipo"), index=True)
     Evento = Column(String, ForeignKey("eventos.id"))
     lugar = Column(String)
     observaciones = Column(String)
@@ -167,11 +184,20 @@ class Partidos(Base):
     # Relación a Rivales
     rival_ref = relationship("Rivales")
     
-    estadisticas_partido = relationship("EstadisticasPartido", back_populates="partido_ref")
-    estadisticas_jugador = relationship("EstadisticasJugador", back_populates="partido_ref")
+    # Match statistics go with the match (ON DELETE CASCADE)
+    estadisticas_partido = relationship("EstadisticasPartido", back_populates="partido_ref", passive_deletes=True)
+    estadisticas_jugador = relationship("EstadisticasJugador", back_populates="partido_ref", passive_deletes=True)
 
 class PartidosExternos(Base):
     __tablename__ = "partidos_externos"
+    __table_args__ = (
+        Index("ix_partidos_externos_fecha_id", "fecha", "id"),
+        # NULLS NOT DISTINCT (0011): an undated match is still matched by its teams
+        UniqueConstraint(
+            "fecha", "equipo_local", "equipo_visitante",
+            name="uq_partidos_externos_fecha_equipos", postgresql_nulls_not_distinct=True,
+        ),
+    )
     ensayos_visitante = Column(Integer)
     fecha = Column(Date)
     marcador_visitante = Column(Integer)
@@ -184,8 +210,8 @@ class PartidosExternos(Base):
     equipo_visitante = Column(String)
     competicion = Column(String)
 
-    estadisticas_partido = relationship("EstadisticasPartido", back_populates="partido_externo_ref")
-    estadisticas_jugador = relationship("EstadisticasJugador", back_populates="partido_externo_ref")
+    estadisticas_partido = relationship("EstadisticasPartido", back_populates="partido_externo_ref", passive_deletes=True)
+    estadisticas_jugador = relationship("EstadisticasJugador", back_populates="partido_externo_ref", passive_deletes=True)
 
 class Convocatoria(Base):
     __tablename__ = "convocatoria"
@@ -208,9 +234,17 @@ class JugadorFamilia(Base):
 class EstadisticasJugador(Base):
     __tablename__ = "estadisticas_jugador"
     fue_convocado = Column(Boolean)
-    partido = Column(String, ForeignKey("partidos.id"))
-    jugador = Column(String, ForeignKey("jugadores_propios.id"))
-    partido_externo = Column(String, ForeignKey("partidos_externos.id"))
+    partido = Column(String, ForeignKey("partidos.id", name="fk_estadisticas_jugador_partido", ondelete="CASCADE"), index=True)
+    jugador = Column(
+        String,
+        ForeignKey("jugadores_propios.id", name="fk_estadisticas_jugador_jugador", ondelete="SET NULL"),
+        index=True,
+    )
+    partido_externo = Column(
+        String,
+        ForeignKey("partidos_externos.id", name="fk_estadisticas_jugador_partido_externo", ondelete="SET NULL"),
+        index=True,
+    )
     jugador_externo = Column(String)
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     dorsal = Column(Integer)
@@ -231,22 +265,45 @@ class EstadisticasJugador(Base):
     partido_externo_ref = relationship("PartidosExternos", back_populates="estadisticas_jugador")
     jugador_ref = relationship("JugadoresPropios", back_populates="estadisticas_jugador")
 
+# Natural key used to upsert player lines: the match (own or external) and the
+# first player identifier available. Expression index, so it lives outside the class.
+ESTADISTICAS_JUGADOR_NATURAL_KEY = (
+    func.coalesce(EstadisticasJugador.partido, EstadisticasJugador.partido_externo),
+    func.coalesce(
+        EstadisticasJugador.jugador,
+        EstadisticasJugador.jugador_externo,
+        EstadisticasJugador.licencia,
+        EstadisticasJugador.nombre,
+    ),
+)
+Index("uq_estadisticas_jugador_natural_key", *ESTADISTICAS_JUGADOR_NATURAL_KEY, unique=True)
+
 class AnalisisPartido(Base):
     __tablename__ = "analisis_partido"
-    raw_json = Column(String)
-    partido_id = Column(String, ForeignKey("partidos.id"))
+    __table_args__ = (
+        UniqueConstraint("partido_id", name="uq_analisis_partido_partido_id"),
+        UniqueConstraint("partido_externo_id", name="uq_analisis_partido_partido_externo_id"),
+    )
+    # gzip of the JSON document (utils.json_blob); deferred so rows load without it
+    raw_json_gz = deferred(Column(LargeBinary))
+    raw_json_etag = Column(String)
+    partido_id = Column(String, ForeignKey("partidos.id", name="fk_analisis_partido_partido_id", ondelete="CASCADE"))
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     video_offset_sec = Column(Integer)
     created_at = Column(DateTime(timezone=True))
     updated_at = Column(DateTime(timezone=True))
-    evento_id = Column(String, ForeignKey("eventos.id"))
-    partido_externo_id = Column(String, ForeignKey("partidos_externos.id"))
+    evento_id = Column(String, ForeignKey("eventos.id"), index=True)
+    partido_externo_id = Column(String, ForeignKey("partidos_externos.id", name="fk_analisis_partido_partido_externo_id", ondelete="CASCADE"))
     video_url = Column(String)
     
     evento_ref = relationship("Eventos", back_populates="analisis")
 
 class PruebasFisicas(Base):
     __tablename__ = "pruebas_fisicas"
+    __table_args__ = (
+        Index("ix_pruebas_fisicas_fecha_id", "fecha", "id"),
+        UniqueConstraint("jugador_id", "fecha", name="uq_pruebas_fisicas_jugador_fecha"),
+    )
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     jugador_id = Column(String, ForeignKey("jugadores_propios.id"))
     fecha = Column(Date)
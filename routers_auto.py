@@ -1,359 +1,386 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
-from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import delete, func, literal_column, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from datetime import date, timedelta
+import uuid
 import models_auto as models
 import schemas_auto as schemas
 from database import get_db
+from utils import etag, json_blob, ref_cache
+from utils.pagination import paginate
+from utils.fields import sparse_query, sparse_response, sparse_schema
+from utils.db_writes import (
+    delete_by_id,
+    insert_many_ignore,
+    update_by_id,
+    update_many_by_id,
+    upsert,
+    upsert_many,
+    upsert_many_returning,
+)
 
 router = APIRouter()
 
 # --- CRUD for Asistencia ---
 @router.get("/asistencia", response_model=List[schemas.AsistenciaResponse], tags=["Asistencia"])
 def read_asistencia_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 10000, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
     entrenamiento: Optional[str] = None,
     jugador: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Asistencia).options(
-        joinedload(models.Asistencia.entrenamientos),
-        joinedload(models.Asistencia.jugadores)
-    )
+    keys = (models.Asistencia.id,)
+    schema = sparse_schema(schemas.AsistenciaResponse, fields, expand, model=models.Asistencia)
+    cached = etag.check(db, request, response, models.Asistencia, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.Asistencia, schema, keys=keys)
     if entrenamiento:
         query = query.filter(models.Asistencia.entrenamiento_id == entrenamiento)
     if jugador:
         query = query.filter(models.Asistencia.jugador_id == jugador)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.Asistencia, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 @router.get("/asistencia/{item_id}", response_model=schemas.AsistenciaResponse, tags=["Asistencia"])
-def read_asistencia(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.Asistencia).filter(models.Asistencia.id == item_id).first()
+def read_asistencia(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.AsistenciaResponse, fields)
+    cached = etag.check(db, request, response, models.Asistencia, schema)
+    if cached is not None: return cached
+    item = sparse_query(db, models.Asistencia, schema).filter(models.Asistencia.id == item_id).first()
     if not item: raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return sparse_response(models.Asistencia, schema, item, response)
 
 @router.post("/asistencia", response_model=schemas.AsistenciaResponse, tags=["Asistencia"])
 def create_asistencia(item: schemas.AsistenciaCreate, db: Session = Depends(get_db)):
-    # Duplicate check using the resolved IDs from the schema
-    existing = db.query(models.Asistencia).filter(
-        models.Asistencia.entrenamiento_id == item.entrenamiento_id,
-        models.Asistencia.jugador_id == item.jugador_id
-    ).first()
-    if existing:
-        existing.asistencia = item.asistencia
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    db_item = models.Asistencia(**item.model_dump())
-    db.add(db_item)
+    # One attendance row per (entrenamiento, jugador): update the status if it exists
+    db_item = upsert(
+        db, models.Asistencia, item.model_dump(),
+        "uq_asistencia_entrenamiento_jugador", update_fields=["asistencia"]
+    )
     db.commit()
-    db.refresh(db_item)
     return db_item
 
 @router.put("/asistencia/{item_id}", response_model=schemas.AsistenciaResponse, tags=["Asistencia"])
 def update_asistencia(item_id: str, item: schemas.AsistenciaUpdate, db: Session = Depends(get_db)):
-    db_item = db.query(models.Asistencia).filter(models.Asistencia.id == item_id).first()
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Asistencia not found")
-    
-    db_item.asistencia = item.asistencia
+    db_item = update_by_id(
+        db, models.Asistencia, item_id, {"asistencia": item.asistencia}, detail="Asistencia not found"
+    )
     db.commit()
-    db.refresh(db_item)
     return db_item
 
 @router.post("/asistencia/bulk", tags=["Asistencia"])
-def create_asistencia_bulk(items: List[schemas.AsistenciaCreate], db: Session = Depends(get_db)):
-    results = []
-    for item in items:
-        # Reuse the logic from create_asistencia for consistency
-        existing = db.query(models.Asistencia).filter(
-            models.Asistencia.entrenamiento_id == item.entrenamiento_id,
-            models.Asistencia.jugador_id == item.jugador_id
-        ).first()
-        
-        if existing:
-            existing.asistencia = item.asistencia
-            results.append(existing)
-        else:
-            db_item = models.Asistencia(**item.model_dump())
-            db.add(db_item)
-            results.append(db_item)
-            
+def create_asistencia_bulk(
+    items: Union[List[schemas.AsistenciaCreate], schemas.AsistenciaBulkCreate],
+    db: Session = Depends(get_db)
+):
+    if isinstance(items, schemas.AsistenciaBulkCreate):
+        rows = [
+            {"entrenamiento_id": items.entrenamiento_id, "jugador_id": jugador_id, "asistencia": asistencia}
+            for jugador_id, asistencia in items.asistencias.items()
+        ]
+    else:
+        rows = [item.model_dump() for item in items]
+
+    # Keep the last status sent for each (entrenamiento, jugador) pair
+    unique_rows = {(row["entrenamiento_id"], row["jugador_id"]): row for row in rows}
+    created, updated = upsert_many(
+        db, models.Asistencia, list(unique_rows.values()),
+        "uq_asistencia_entrenamiento_jugador", update_fields=["asistencia"]
+    )
     db.commit()
-    # Refreshing all might be expensive, but needed for response if we returned full objects
-    # For now, just return a success message or count to keep it simple and fast
-    return {"message": f"Successfully processed {len(items)} attendance records", "count": len(items)}
+    return {
+        "message": f"Successfully processed {len(rows)} attendance records",
+        "count": len(rows),
+        "created": created,
+        "updated": updated
+    }
 
 # --- CRUD for EstadisticasPartido ---
 @router.get("/estadisticas_partido", response_model=List[schemas.EstadisticasPartidoResponse], tags=["EstadisticasPartido"])
 def read_estadisticas_partido_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 10000, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     partido: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.EstadisticasPartido)
+    keys = (models.EstadisticasPartido.fecha, models.EstadisticasPartido.id)
+    schema = sparse_schema(schemas.EstadisticasPartidoResponse, fields)
+    cached = etag.check(db, request, response, models.EstadisticasPartido, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.EstadisticasPartido, schema, keys=keys)
     if partido:
         query = query.filter(models.EstadisticasPartido.partido_id == partido)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.EstadisticasPartido, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 # --- CRUD for Entrenamientos ---
 @router.get("/entrenamientos", response_model=List[schemas.EntrenamientosDetalleResponse], tags=["Entrenamientos"])
 def read_entrenamientos_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 10000, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
     evento: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Entrenamientos).options(
-        joinedload(models.Entrenamientos.evento_ref),
-        joinedload(models.Entrenamientos.asistencias)
-    )
+    keys = (models.Entrenamientos.id_entrenamiento,)
+    schema = sparse_schema(schemas.EntrenamientosDetalleResponse, fields, expand, model=models.Entrenamientos)
+    cached = etag.check(db, request, response, models.Entrenamientos, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.Entrenamientos, schema, keys=keys)
     if evento:
         query = query.filter(models.Entrenamientos.evento == evento)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.Entrenamientos, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 @router.get("/entrenamientos/{item_id}", response_model=schemas.EntrenamientosDetalleResponse, tags=["Entrenamientos"])
-def read_entrenamientos(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.Entrenamientos).options(
-        joinedload(models.Entrenamientos.evento_ref),
-        joinedload(models.Entrenamientos.asistencias)
-    ).filter(models.Entrenamientos.id_entrenamiento == item_id).first()
+def read_entrenamientos(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.EntrenamientosDetalleResponse, fields)
+    cached = etag.check(db, request, response, models.Entrenamientos, schema)
+    if cached is not None: return cached
+    item = sparse_query(db, models.Entrenamientos, schema).filter(models.Entrenamientos.id_entrenamiento == item_id).first()
     if not item: raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return sparse_response(models.Entrenamientos, schema, item, response)
 
 # --- CRUD for Rivales ---
 @router.get("/rivales", response_model=List[schemas.RivalesResponse], tags=["Rivales"])
-def read_rivales_list(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(models.Rivales).offset(skip).limit(limit).all()
+def read_rivales_list(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    keys = (models.Rivales.id_equipo,)
+    schema = sparse_schema(schemas.RivalesResponse, fields)
+    return ref_cache.list_response(db, request, response, models.Rivales, schema, keys, cursor, skip, limit)
 
 @router.get("/rivales/{item_id}", response_model=schemas.RivalesResponse, tags=["Rivales"])
-def read_rivales(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.Rivales).filter(models.Rivales.id_equipo == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Item not found")
-    return item
+def read_rivales(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.RivalesResponse, fields)
+    return ref_cache.detail_response(db, request, response, models.Rivales, schema, (models.Rivales.id_equipo,), item_id, detail="Item not found")
 
 # --- CRUD for Staff ---
 @router.get("/Staff", response_model=List[schemas.StaffResponse], tags=["Staff"])
 @router.get("/staff", response_model=List[schemas.StaffResponse], tags=["Staff"])
-def read_staff_list(skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
-    return db.query(models.Staff).offset(skip).limit(limit).all()
+def read_staff_list(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    keys = (models.Staff.id,)
+    schema = sparse_schema(schemas.StaffResponse, fields)
+    return ref_cache.list_response(db, request, response, models.Staff, schema, keys, cursor, skip, limit)
 
 @router.get("/Staff/{item_id}", response_model=schemas.StaffResponse, tags=["Staff"])
 @router.get("/staff/{item_id}", response_model=schemas.StaffResponse, tags=["Staff"])
-def read_staff(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.Staff).filter(models.Staff.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Staff not found")
-    return item
+def read_staff(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.StaffResponse, fields)
+    return ref_cache.detail_response(db, request, response, models.Staff, schema, (models.Staff.id,), item_id, detail="Staff not found")
 
 # --- CRUD for JugadoresPropios ---
 @router.get("/jugadores_propios", response_model=List[schemas.JugadoresPropiosResponse], tags=["JugadoresPropios"])
 def read_jugadores_propios_list(
-    skip: int = 0, 
-    limit: int = 100, 
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     email: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.JugadoresPropios)
-    if email:
-        query = query.filter(models.JugadoresPropios.email == email)
-    return query.offset(skip).limit(limit).all()
+    keys = (models.JugadoresPropios.id,)
+    schema = sparse_schema(schemas.JugadoresPropiosResponse, fields)
+    return ref_cache.list_response(db, request, response, models.JugadoresPropios, schema, keys, cursor, skip, limit, filters={"email": email})
 
 @router.get("/jugadores_propios/{item_id}", response_model=schemas.JugadoresPropiosResponse, tags=["JugadoresPropios"])
-def read_jugadores_propios(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.JugadoresPropios).filter(models.JugadoresPropios.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Jugador not found")
-    return item
+def read_jugadores_propios(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.JugadoresPropiosResponse, fields)
+    return ref_cache.detail_response(db, request, response, models.JugadoresPropios, schema, (models.JugadoresPropios.id,), item_id, detail="Jugador not found")
 
 @router.post("/jugadores_propios", response_model=schemas.JugadoresPropiosResponse, tags=["JugadoresPropios"])
 def create_jugador_propio(obj_in: schemas.JugadoresPropiosCreate, db: Session = Depends(get_db)):
     db_obj = models.JugadoresPropios(**obj_in.model_dump())
     db.add(db_obj)
     db.commit()
-    db.refresh(db_obj)
+    ref_cache.invalidate(models.JugadoresPropios)
     return db_obj
 
 @router.put("/jugadores_propios/{item_id}", response_model=schemas.JugadoresPropiosResponse, tags=["JugadoresPropios"])
 def update_jugador_propio(item_id: str, obj_in: schemas.JugadoresPropiosUpdate, db: Session = Depends(get_db)):
-    db_obj = db.query(models.JugadoresPropios).filter(models.JugadoresPropios.id == item_id).first()
-    if not db_obj:
-        raise HTTPException(status_code=404, detail="Jugador not found")
-    
-    update_data = obj_in.model_dump(exclude_unset=True)
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    
-    db.add(db_obj)
+    db_obj = update_by_id(db, models.JugadoresPropios, item_id, obj_in.model_dump(exclude_unset=True), detail="Jugador not found")
     db.commit()
-    db.refresh(db_obj)
+    ref_cache.invalidate(models.JugadoresPropios)
     return db_obj
 
 @router.delete("/jugadores_propios/{item_id}", tags=["JugadoresPropios"])
 def delete_jugador_propio(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.JugadoresPropios).filter(models.JugadoresPropios.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Jugador not found")
-    db.delete(item)
+    delete_by_id(db, models.JugadoresPropios, item_id, detail="Jugador not found")
     db.commit()
+    ref_cache.invalidate(models.JugadoresPropios)
     return {"message": "Deleted successfully"}
 
 # --- CRUD for Eventos ---
 @router.get("/eventos", response_model=List[schemas.EventosResponse], tags=["Eventos"])
 def read_eventos_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 10000, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
     tipo: Optional[str] = None,
     fecha: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Eventos).options(
-        joinedload(models.Eventos.partido),
-        joinedload(models.Eventos.entrenamiento),
-        joinedload(models.Eventos.analisis)
-    )
+    keys = (models.Eventos.fecha, models.Eventos.id)
+    schema = sparse_schema(schemas.EventosResponse, fields, expand, model=models.Eventos)
+    cached = etag.check(db, request, response, models.Eventos, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.Eventos, schema, keys=keys)
     if tipo:
         query = query.filter(models.Eventos.tipo == tipo)
     if fecha:
         query = query.filter(models.Eventos.fecha == fecha)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.Eventos, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 # --- CRUD for JugadoresExternos ---
 @router.get("/jugadores_externos/", response_model=List[schemas.JugadoresExternosResponse], tags=["JugadoresExternos"])
 @router.get("/jugadores_externos", response_model=List[schemas.JugadoresExternosResponse], tags=["JugadoresExternos"])
-def read_jugadores_externos_list(skip: int = 0, limit: int = 1000, db: Session = Depends(get_db)):
-    return db.query(models.JugadoresExternos).offset(skip).limit(limit).all()
+def read_jugadores_externos_list(
+    request: Request,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    keys = (models.JugadoresExternos.id,)
+    schema = sparse_schema(schemas.JugadoresExternosResponse, fields)
+    return ref_cache.list_response(db, request, response, models.JugadoresExternos, schema, keys, cursor, skip, limit)
 
 @router.post("/jugadores_externos/", response_model=schemas.JugadoresExternosResponse, tags=["JugadoresExternos"])
 @router.post("/jugadores_externos", response_model=schemas.JugadoresExternosResponse, tags=["JugadoresExternos"])
 def create_jugador_externo(item: schemas.JugadoresExternosCreate, db: Session = Depends(get_db)):
-    # Duplicate check by licencia
-    if item.licencia:
-        existing = db.query(models.JugadoresExternos).filter(models.JugadoresExternos.licencia == item.licencia).first()
-        if existing:
-            # Update existing
-            existing.nombre_completo = item.nombre_completo
-            existing.ultimo_equipo = item.ultimo_equipo
-            db.commit()
-            db.refresh(existing)
-            return existing
-    
-    db_item = models.JugadoresExternos(**item.model_dump())
-    db.add(db_item)
+    # Licencia identifies the player: update name and team if already known.
+    # A blank one is no licencia: stored as NULL so it never hits the unique key.
+    data = item.model_dump()
+    if not (data["licencia"] or "").strip():
+        data["licencia"] = None
+    conflict = "uq_jugadores_externos_licencia" if data["licencia"] else None
+    db_item = upsert(
+        db, models.JugadoresExternos, data,
+        conflict, update_fields=["nombre_completo", "ultimo_equipo"]
+    )
     db.commit()
-    db.refresh(db_item)
+    ref_cache.invalidate(models.JugadoresExternos)
     return db_item
 
 # --- CRUD for Partidos ---
 @router.get("/partidos", response_model=List[schemas.PartidosResponse], tags=["Partidos"])
 def read_partidos_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 10000, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
     rival: Optional[str] = None,
     evento: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.Partidos).options(
-        joinedload(models.Partidos.estadisticas_partido),
-        joinedload(models.Partidos.estadisticas_jugador)
-    )
+    keys = (models.Partidos.id,)
+    schema = sparse_schema(schemas.PartidosResponse, fields, expand, model=models.Partidos)
+    cached = etag.check(db, request, response, models.Partidos, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.Partidos, schema, keys=keys)
     if rival:
         query = query.filter(models.Partidos.Rival == rival)
     if evento:
         query = query.filter(models.Partidos.Evento == evento)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.Partidos, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 @router.get("/partidos/{item_id}", response_model=schemas.PartidosResponse, tags=["Partidos"])
-def read_partido(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.Partidos).options(
-        joinedload(models.Partidos.estadisticas_partido),
-        joinedload(models.Partidos.estadisticas_jugador)
-    ).filter(models.Partidos.id == item_id).first()
+def read_partido(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.PartidosResponse, fields)
+    cached = etag.check(db, request, response, models.Partidos, schema)
+    if cached is not None: return cached
+    item = sparse_query(db, models.Partidos, schema).filter(models.Partidos.id == item_id).first()
     if not item: raise HTTPException(status_code=404, detail="Partido not found")
-    return item
+    return sparse_response(models.Partidos, schema, item, response)
 
 @router.put("/partidos/{item_id}", response_model=schemas.PartidosResponse, tags=["Partidos"])
 def update_partido(item_id: str, obj_in: schemas.PartidosUpdate, db: Session = Depends(get_db)):
-    db_obj = db.query(models.Partidos).filter(models.Partidos.id == item_id).first()
-    if not db_obj:
-        raise HTTPException(status_code=404, detail="Partido not found")
-    
-    update_data = obj_in.model_dump(exclude_unset=True)
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    
-    db.add(db_obj)
+    db_obj = update_by_id(db, models.Partidos, item_id, obj_in.model_dump(exclude_unset=True), detail="Partido not found")
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 # --- CRUD for PartidosExternos ---
 @router.get("/partidos_externos", response_model=List[schemas.PartidosExternosResponse], tags=["PartidosExternos"])
 def read_partidos_externos_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
     fecha: Optional[date] = None,
     equipo_local: Optional[str] = None,
     equipo_visitante: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.PartidosExternos).options(
-        joinedload(models.PartidosExternos.estadisticas_partido),
-        joinedload(models.PartidosExternos.estadisticas_jugador)
-    )
+    keys = (models.PartidosExternos.fecha, models.PartidosExternos.id)
+    schema = sparse_schema(schemas.PartidosExternosResponse, fields, expand, model=models.PartidosExternos)
+    cached = etag.check(db, request, response, models.PartidosExternos, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.PartidosExternos, schema, keys=keys)
     if fecha:
         query = query.filter(models.PartidosExternos.fecha == fecha)
     if equipo_local:
         query = query.filter(models.PartidosExternos.equipo_local == equipo_local)
     if equipo_visitante:
         query = query.filter(models.PartidosExternos.equipo_visitante == equipo_visitante)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.PartidosExternos, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 @router.post("/partidos_externos", response_model=schemas.PartidosExternosResponse, tags=["PartidosExternos"])
 def create_partido_externo(obj_in: schemas.PartidosExternosCreate, db: Session = Depends(get_db)):
-    obj_data = obj_in.model_dump()
-    
-    # Upsert logic: check by date and teams
-    existing = db.query(models.PartidosExternos).filter(
-        models.PartidosExternos.fecha == obj_data["fecha"],
-        models.PartidosExternos.equipo_local == obj_data["equipo_local"],
-        models.PartidosExternos.equipo_visitante == obj_data["equipo_visitante"]
-    ).first()
-    
-    if existing:
-        for field, value in obj_data.items():
-            if field != "id":
-                setattr(existing, field, value)
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    db_obj = models.PartidosExternos(**obj_data)
-    db.add(db_obj)
+    # Upsert logic: a match is identified by date and teams (NULLs match each other, as the old IS NULL lookup did)
+    db_obj = upsert(db, models.PartidosExternos, obj_in.model_dump(), "uq_partidos_externos_fecha_equipos")
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 @router.put("/partidos_externos/{item_id}", response_model=schemas.PartidosExternosResponse, tags=["PartidosExternos"])
 def update_partido_externo(item_id: str, obj_in: schemas.PartidosExternosBase, db: Session = Depends(get_db)):
-    db_obj = db.query(models.PartidosExternos).filter(models.PartidosExternos.id == item_id).first()
-    if not db_obj:
-        raise HTTPException(status_code=404, detail="PartidoExterno not found")
-    
-    update_data = obj_in.model_dump(exclude_unset=True)
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    
-    db.add(db_obj)
+    db_obj = update_by_id(db, models.PartidosExternos, item_id, obj_in.model_dump(exclude_unset=True), detail="PartidoExterno not found")
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 @router.delete("/partidos_externos/{item_id}", tags=["PartidosExternos"])
 def delete_partido_externo(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.PartidosExternos).filter(models.PartidosExternos.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Item not found")
-    db.delete(item)
+    delete_by_id(db, models.PartidosExternos, item_id)
     db.commit()
     return {"message": "Deleted successfully"}
 
@@ -361,68 +388,89 @@ def delete_partido_externo(item_id: str, db: Session = Depends(get_db)):
 @router.get("/estadisticas_jugador/", response_model=List[schemas.EstadisticasJugadorResponse], tags=["EstadisticasJugador"])
 @router.get("/estadisticas_jugador", response_model=List[schemas.EstadisticasJugadorResponse], tags=["EstadisticasJugador"])
 def read_estadisticas_jugador_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 10000, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     partido: Optional[str] = None,
     partido_externo: Optional[str] = None,
     jugador: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.EstadisticasJugador)
+    keys = (models.EstadisticasJugador.id,)
+    schema = sparse_schema(schemas.EstadisticasJugadorResponse, fields)
+    cached = etag.check(db, request, response, models.EstadisticasJugador, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.EstadisticasJugador, schema, keys=keys)
     if partido:
         query = query.filter(models.EstadisticasJugador.partido == partido)
     if partido_externo:
         query = query.filter(models.EstadisticasJugador.partido_externo == partido_externo)
     if jugador:
         query = query.filter(models.EstadisticasJugador.jugador == jugador)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.EstadisticasJugador, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 @router.get("/estadisticas_jugador/{item_id}", response_model=schemas.EstadisticasJugadorResponse, tags=["EstadisticasJugador"])
-def read_estadisticas_jugador(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.EstadisticasJugador).filter(models.EstadisticasJugador.id == item_id).first()
+def read_estadisticas_jugador(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.EstadisticasJugadorResponse, fields)
+    cached = etag.check(db, request, response, models.EstadisticasJugador, schema)
+    if cached is not None: return cached
+    item = sparse_query(db, models.EstadisticasJugador, schema).filter(models.EstadisticasJugador.id == item_id).first()
     if not item: raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return sparse_response(models.EstadisticasJugador, schema, item, response)
 
 @router.post("/estadisticas_jugador", response_model=schemas.EstadisticasJugadorResponse, tags=["EstadisticasJugador"])
 def create_estadisticas_jugador(obj_in: schemas.EstadisticasJugadorCreate, db: Session = Depends(get_db)):
-    obj_data = obj_in.model_dump()
-    
-    # Duplicate check logic
-    query = db.query(models.EstadisticasJugador)
-    if obj_data.get("partido"):
-        query = query.filter(models.EstadisticasJugador.partido == obj_data["partido"])
-    elif obj_data.get("partido_externo"):
-        query = query.filter(models.EstadisticasJugador.partido_externo == obj_data["partido_externo"])
-    
-    if obj_data.get("jugador"):
-        query = query.filter(models.EstadisticasJugador.jugador == obj_data["jugador"])
-    elif obj_data.get("jugador_externo"):
-        query = query.filter(models.EstadisticasJugador.jugador_externo == obj_data["jugador_externo"])
-    elif obj_data.get("licencia"):
-        query = query.filter(models.EstadisticasJugador.licencia == obj_data["licencia"])
-    else:
-        query = query.filter(models.EstadisticasJugador.nombre == obj_data["nombre"])
-    
-    existing = query.first()
-    if existing:
-        for field, value in obj_data.items():
-            if field != "id":
-                setattr(existing, field, value)
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    db_obj = models.EstadisticasJugador(**obj_data)
-    db.add(db_obj)
+    # Duplicate detection: (partido | partido_externo) + (jugador | jugador_externo | licencia | nombre)
+    db_obj = upsert(
+        db, models.EstadisticasJugador, obj_in.model_dump(),
+        models.ESTADISTICAS_JUGADOR_NATURAL_KEY
+    )
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
+@router.post("/estadisticas_jugador/bulk", response_model=schemas.ActaBulkResponse, tags=["EstadisticasJugador"])
+def create_estadisticas_jugador_bulk(acta: schemas.ActaBulkCreate, db: Session = Depends(get_db)):
+    if bool(acta.partido) == bool(acta.partido_externo):
+        raise HTTPException(status_code=400, detail="Must provide either partido or partido_externo")
+
+    rows = {}
+    for linea in acta.jugadores:
+        row = linea.model_dump()
+        row["id"] = row["id"] or str(uuid.uuid4())
+        row["partido"], row["partido_externo"] = acta.partido, acta.partido_externo
+        # Same identity as the natural key index (COALESCE keeps ''); the last line sent for a player wins
+        identity = next(
+            (row[k] for k in ("jugador", "jugador_externo", "licencia", "nombre") if row[k] is not None), None
+        )
+        if identity is None:
+            raise HTTPException(status_code=400, detail="Each player line needs jugador, jugador_externo, licencia or nombre")
+        rows[identity] = row
+
+    update_fields = [c for c in next(iter(rows.values()), {}) if c != "id"]
+    created, updated = upsert_many(
+        db, models.EstadisticasJugador, list(rows.values()),
+        models.ESTADISTICAS_JUGADOR_NATURAL_KEY, update_fields=update_fields
+    )
+
+    # Mark the acta as processed in the same transaction as the player lines
+    stats = acta.estadisticas_partido.model_dump(exclude_unset=True) if acta.estadisticas_partido else {}
+    stats.update(
+        partido_id=acta.partido,
+        partido_externo_id=acta.partido_externo,
+        acta_procesada=True,
+        fecha_procesado=func.now(),
+    )
+    conflict = "uq_estadisticas_partido_partido_id" if acta.partido else "uq_estadisticas_partido_partido_externo_id"
+    estadisticas_partido = upsert(db, models.EstadisticasPartido, stats, conflict)
+    db.commit()
+    return {"estadisticas_partido": estadisticas_partido, "created": created, "updated": updated}
+
 @router.delete("/estadisticas_jugador/{item_id}", tags=["EstadisticasJugador"])
 def delete_estadisticas_jugador_by_id(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.EstadisticasJugador).filter(models.EstadisticasJugador.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Item not found")
-    db.delete(item)
+    delete_by_id(db, models.EstadisticasJugador, item_id)
     db.commit()
     return {"message": "Deleted successfully"}
 
@@ -448,107 +496,97 @@ def delete_estadisticas_jugador(
 # --- analísis_partido METHODS ---
 @router.get("/analisis_partido", response_model=List[schemas.AnalisisPartidoResponse], tags=["AnalisisPartido"])
 def read_analisis_partido_list(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 1000, 
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     partido: Optional[str] = None,
     partido_externo: Optional[str] = None,
     evento: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    query = db.query(models.AnalisisPartido)
+    keys = (models.AnalisisPartido.id,)
+    schema = sparse_schema(schemas.AnalisisPartidoResponse, fields)
+    cached = etag.check(db, request, response, models.AnalisisPartido, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.AnalisisPartido, schema, keys=keys)
     if partido:
         query = query.filter(models.AnalisisPartido.partido_id == partido)
     if partido_externo:
         query = query.filter(models.AnalisisPartido.partido_externo_id == partido_externo)
     if evento:
         query = query.filter(models.AnalisisPartido.evento_id == evento)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.AnalisisPartido, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 @router.post("/analisis_partido", response_model=schemas.AnalisisPartidoResponse, tags=["AnalisisPartido"])
 def create_analisis_partido(obj_in: schemas.AnalisisPartidoCreate, db: Session = Depends(get_db)):
-    import json
     obj_data = obj_in.model_dump()
     
-    query = db.query(models.AnalisisPartido)
+    # One analysis per match (own or external)
+    conflict = None
     if obj_data.get("partido_id"):
-        query = query.filter(models.AnalisisPartido.partido_id == obj_data["partido_id"])
+        conflict = "uq_analisis_partido_partido_id"
     elif obj_data.get("partido_externo_id"):
-        query = query.filter(models.AnalisisPartido.partido_externo_id == obj_data["partido_externo_id"])
+        conflict = "uq_analisis_partido_partido_externo_id"
     
-    existing = query.first()
-    if obj_data.get("raw_json") is not None and not isinstance(obj_data["raw_json"], str):
-        obj_data["raw_json"] = json.dumps(obj_data["raw_json"])
+    obj_data["raw_json_gz"], obj_data["raw_json_etag"] = json_blob.pack(obj_data.pop("raw_json"))
         
-    if existing:
-        for field, value in obj_data.items():
-            if field != "id":
-                setattr(existing, field, value)
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    db_obj = models.AnalisisPartido(**obj_data)
-    db.add(db_obj)
+    db_obj = upsert(db, models.AnalisisPartido, obj_data, conflict)
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 @router.put("/analisis_partido/{item_id}", response_model=schemas.AnalisisPartidoResponse, tags=["AnalisisPartido"])
 def update_analisis_partido(item_id: str, obj_in: schemas.AnalisisPartidoUpdate, db: Session = Depends(get_db)):
-    import json
-    db_obj = db.query(models.AnalisisPartido).filter(models.AnalisisPartido.id == item_id).first()
-    if not db_obj:
-        raise HTTPException(status_code=404, detail="Analisis not found")
-    
     update_data = obj_in.model_dump(exclude_unset=True)
-    if update_data.get("raw_json") is not None and not isinstance(update_data["raw_json"], str):
-        update_data["raw_json"] = json.dumps(update_data["raw_json"])
+    if "raw_json" in update_data:
+        update_data["raw_json_gz"], update_data["raw_json_etag"] = json_blob.pack(update_data.pop("raw_json"))
         
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    
-    db.add(db_obj)
+    db_obj = update_by_id(db, models.AnalisisPartido, item_id, update_data, detail="Analisis not found")
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
+@router.get("/analisis_partido/{item_id}/raw_json", tags=["AnalisisPartido"])
+def read_analisis_partido_raw_json(item_id: str, request: Request, db: Session = Depends(get_db)):
+    row = db.execute(select(models.AnalisisPartido.raw_json_etag).where(models.AnalisisPartido.id == item_id)).first()
+    if row is None: raise HTTPException(status_code=404, detail="Analisis not found")
+    tag = row.raw_json_etag
+    if tag is None: raise HTTPException(status_code=404, detail="Analisis has no raw_json")
+    # Revalidations are answered from the ETag alone, without reading the blob
+    if etag.matches(request, tag):
+        return json_blob.blob_response(request, b"", tag)
+    gz = db.scalar(select(models.AnalisisPartido.raw_json_gz).where(models.AnalisisPartido.id == item_id))
+    return json_blob.blob_response(request, gz, tag)
+
 # --- estadisticas_partido METHODS ---
 @router.get("/estadisticas_partido/{item_id}", response_model=schemas.EstadisticasPartidoResponse, tags=["EstadisticasPartido"])
-def read_estadisticas_partido(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.EstadisticasPartido).filter(models.EstadisticasPartido.id == item_id).first()
+def read_estadisticas_partido(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.EstadisticasPartidoResponse, fields)
+    cached = etag.check(db, request, response, models.EstadisticasPartido, schema)
+    if cached is not None: return cached
+    item = sparse_query(db, models.EstadisticasPartido, schema).filter(models.EstadisticasPartido.id == item_id).first()
     if not item: raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return sparse_response(models.EstadisticasPartido, schema, item, response)
 
 @router.post("/estadisticas_partido", response_model=schemas.EstadisticasPartidoResponse, tags=["EstadisticasPartido"])
 def create_estadisticas_partido(obj_in: schemas.EstadisticasPartidoCreate, db: Session = Depends(get_db)):
     obj_data = obj_in.model_dump()
     
-    query = db.query(models.EstadisticasPartido)
+    # One stats row per match (own or external)
+    conflict = None
     if obj_data.get("partido_id"):
-        query = query.filter(models.EstadisticasPartido.partido_id == obj_data["partido_id"])
+        conflict = "uq_estadisticas_partido_partido_id"
     elif obj_data.get("partido_externo_id"):
-        query = query.filter(models.EstadisticasPartido.partido_externo_id == obj_data["partido_externo_id"])
+        conflict = "uq_estadisticas_partido_partido_externo_id"
     
-    existing = query.first()
-    if existing:
-        for field, value in obj_data.items():
-            if field != "id":
-                setattr(existing, field, value)
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    db_obj = models.EstadisticasPartido(**obj_data)
-    db.add(db_obj)
+    db_obj = upsert(db, models.EstadisticasPartido, obj_data, conflict)
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 @router.delete("/estadisticas_partido/{item_id}", tags=["EstadisticasPartido"])
 def delete_estadisticas_partido_by_id(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.EstadisticasPartido).filter(models.EstadisticasPartido.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Item not found")
-    db.delete(item)
+    delete_by_id(db, models.EstadisticasPartido, item_id)
     db.commit()
     return {"message": "Deleted successfully"}
 
@@ -561,40 +599,42 @@ def borrar_datos_partido(payload: dict, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Missing match_id or type")
 
     if match_type == 'standard':
-        db.query(models.EstadisticasJugador).filter(models.EstadisticasJugador.partido == match_id).delete()
-        db.query(models.EstadisticasPartido).filter(models.EstadisticasPartido.partido_id == match_id).delete()
-        db.query(models.AnalisisPartido).filter(models.AnalisisPartido.partido_id == match_id).delete()
-        
-        partido = db.query(models.Partidos).filter(models.Partidos.id == match_id).first()
-        if partido:
-            partido.marcador_local = None
-            partido.marcador_visitante = None
-            partido.ensayos_local = 0
-            partido.ensayos_visitante = 0
-            partido.acta_url = None
-            
+        match_table = "partidos"
+        statements = {
+            "estadisticas_jugador": delete(models.EstadisticasJugador.__table__).where(models.EstadisticasJugador.partido == match_id),
+            "estadisticas_partido": delete(models.EstadisticasPartido.__table__).where(models.EstadisticasPartido.partido_id == match_id),
+            "analisis_partido": delete(models.AnalisisPartido.__table__).where(models.AnalisisPartido.partido_id == match_id),
+            "partidos": update(models.Partidos.__table__).where(models.Partidos.id == match_id).values(
+                marcador_local=None, marcador_visitante=None, ensayos_local=0, ensayos_visitante=0, acta_url=None
+            ),
+        }
     elif match_type == 'external':
-        db.query(models.EstadisticasJugador).filter(models.EstadisticasJugador.partido_externo == match_id).delete()
-        db.query(models.EstadisticasPartido).filter(models.EstadisticasPartido.partido_externo_id == match_id).delete()
-        db.query(models.AnalisisPartido).filter(models.AnalisisPartido.partido_externo_id == match_id).delete()
-        db.query(models.PartidosExternos).filter(models.PartidosExternos.id == match_id).delete()
-    
+        match_table = "partidos_externos"
+        statements = {
+            "estadisticas_jugador": delete(models.EstadisticasJugador.__table__).where(models.EstadisticasJugador.partido_externo == match_id),
+            "estadisticas_partido": delete(models.EstadisticasPartido.__table__).where(models.EstadisticasPartido.partido_externo_id == match_id),
+            "analisis_partido": delete(models.AnalisisPartido.__table__).where(models.AnalisisPartido.partido_externo_id == match_id),
+            "partidos_externos": delete(models.PartidosExternos.__table__).where(models.PartidosExternos.id == match_id),
+        }
+    else:
+        raise HTTPException(status_code=400, detail="type must be 'standard' or 'external'")
+
+    # Every DELETE/UPDATE runs as a CTE of a single statement that reports the affected rows per table
+    ctes = {name: stmt.returning(literal_column("1")).cte(f"affected_{name}") for name, stmt in statements.items()}
+    counts = db.execute(select(*(
+        select(func.count()).select_from(cte).scalar_subquery().label(name) for name, cte in ctes.items()
+    ))).one()._asdict()
+    if not counts[match_table]:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Match not found")
+
     db.commit()
-    return {"message": "Match data deleted/reset successfully"}
+    return {"message": "Match data deleted/reset successfully", "counts": counts}
 
 @router.put("/estadisticas_partido/{item_id}", response_model=schemas.EstadisticasPartidoResponse, tags=["EstadisticasPartido"])
 def update_estadisticas_partido(item_id: str, obj_in: schemas.EstadisticasPartidoUpdate, db: Session = Depends(get_db)):
-    db_obj = db.query(models.EstadisticasPartido).filter(models.EstadisticasPartido.id == item_id).first()
-    if not db_obj:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    update_data = obj_in.model_dump(exclude_unset=True)
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    
-    db.add(db_obj)
+    db_obj = update_by_id(db, models.EstadisticasPartido, item_id, obj_in.model_dump(exclude_unset=True))
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 @router.delete("/estadisticas_partido", tags=["EstadisticasPartido"])
@@ -618,156 +658,190 @@ def delete_estadisticas_partido(
 
 @router.delete("/asistencia/{item_id}", tags=["Asistencia"])
 def delete_asistencia(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.Asistencia).filter(models.Asistencia.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Item not found")
-    db.delete(item)
+    delete_by_id(db, models.Asistencia, item_id)
     db.commit()
     return {"message": "Deleted successfully"}
 
-@router.post("/crear_o_actualizar_evento", tags=["CustomOps"])
-def crear_o_actualizar_evento(obj_in: schemas.EventoCreateUpdate, db: Session = Depends(get_db)):
-    import uuid
-    
-    # 1. Handle Evento (Base)
-    evento_id = obj_in.id
-    db_evento = None
-    
-    if evento_id:
-        db_evento = db.query(models.Eventos).filter(models.Eventos.id == evento_id).first()
-    
-    # Logic: if no ID, check if an event exists for the same date and time
-    if not db_evento:
-        db_evento = db.query(models.Eventos).filter(
-            models.Eventos.fecha == obj_in.fecha,
-            models.Eventos.hora == obj_in.hora
-        ).first()
-
-    if db_evento:
-        # Update existing
-        db_evento.tipo = obj_in.tipo
-        db_evento.fecha = obj_in.fecha
-        db_evento.hora = obj_in.hora
-        db_evento.estado = obj_in.estado
-        db_evento.observaciones = obj_in.observaciones
-    else:
-        # Create new
-        new_id = str(uuid.uuid4())
-        db_evento = models.Eventos(
-            id=new_id,
-            tipo=obj_in.tipo,
-            fecha=obj_in.fecha,
-            hora=obj_in.hora,
-            estado=obj_in.estado,
-            observaciones=obj_in.observaciones
+_EVENTO_FIELDS = ["tipo", "fecha", "hora", "estado", "observaciones"]
+_PARTIDO_FIELDS = ["Rival", "es_local", "lugar", "marcador_local", "marcador_visitante"]
+_ENTRENAMIENTO_FIELDS = ["calentamiento", "trabajo_separado", "trabajo_conjunto"]
+
+def _slot(fecha, hora):
+    # timetz comes back with the session offset; match on the wall-clock time
+    return fecha, hora.replace(tzinfo=None)
+
+def _escribir_eventos(db: Session, items: List[schemas.EventoCreateUpdate]):
+    """
+    Saves events plus their Partido/Entrenamiento with a fixed number of
+    statements, whatever the number of events: an UPDATE by id for the ones
+    that carry one, an upsert on (fecha, hora) for the rest, and one upsert
+    per detail table on its evento key.
+    """
+    saved = {}
+    with_id = {i: item for i, item in enumerate(items) if item.id}
+    if with_id:
+        rows = [{"id": item.id, **item.model_dump(include=set(_EVENTO_FIELDS))} for item in with_id.values()]
+        updated = {ev.id: ev for ev in update_many_by_id(db, models.Eventos, rows, _EVENTO_FIELDS)}
+        saved = {i: updated[item.id] for i, item in with_id.items() if item.id in updated}
+
+    # No id (or an id that no longer exists): same date and time means same event
+    pending = [(i, item) for i, item in enumerate(items) if i not in saved]
+    if pending:
+        rows = {_slot(item.fecha, item.hora): item.model_dump(include=set(_EVENTO_FIELDS)) for _, item in pending}
+        upserted = upsert_many_returning(
+            db, models.Eventos, list(rows.values()), "uq_eventos_fecha_hora",
+            update_fields=["tipo", "estado", "observaciones"]
         )
-        db.add(db_evento)
-    
-    db.flush() # Get the ID if new
-    actual_evento_id = db_evento.id
-
-    # 2. Handle Specific Data (Partido or Entrenamiento)
-    if obj_in.tipo == 'Partido':
-        # Check if Partidos entry exists for this event
-        db_partido = db.query(models.Partidos).filter(models.Partidos.Evento == actual_evento_id).first()
-        
-        if db_partido:
-            db_partido.rival_id = obj_in.rival_id
-            db_partido.es_local = obj_in.es_local
-            db_partido.lugar = obj_in.lugar
-            db_partido.marcador_local = obj_in.marcador_local
-            db_partido.marcador_visitante = obj_in.marcador_visitante
-        else:
-            new_partido = models.Partidos(
-                id=str(uuid.uuid4()),
-                Evento=actual_evento_id,
-                Rival=obj_in.rival_id,
-                es_local=obj_in.es_local,
-                lugar=obj_in.lugar,
-                marcador_local=obj_in.marcador_local,
-                marcador_visitante=obj_in.marcador_visitante
-            )
-            db.add(new_partido)
-            
-    elif obj_in.tipo == 'Entrenamiento':
-        # Check if Entrenamientos entry exists for this event
-        db_entrenamiento = db.query(models.Entrenamientos).filter(models.Entrenamientos.evento == actual_evento_id).first()
-        
-        if db_entrenamiento:
-            db_entrenamiento.calentamiento = obj_in.calentamiento
-            db_entrenamiento.trabajo_separado = obj_in.trabajo_separado
-            db_entrenamiento.trabajo_conjunto = obj_in.trabajo_conjunto
-        else:
-            new_entrenamiento = models.Entrenamientos(
-                id_entrenamiento=str(uuid.uuid4()),
-                evento=actual_evento_id,
-                calentamiento=obj_in.calentamiento,
-                trabajo_separado=obj_in.trabajo_separado,
-                trabajo_conjunto=obj_in.trabajo_conjunto
-            )
-            db.add(new_entrenamiento)
+        by_slot = {_slot(ev.fecha, ev.hora): ev for ev in upserted}
+        saved.update({i: by_slot[_slot(item.fecha, item.hora)] for i, item in pending})
+
+    partidos, entrenamientos = {}, {}
+    for i, item in enumerate(items):
+        evento_id = saved[i].id
+        if item.tipo == 'Partido':
+            partidos[evento_id] = {
+                "Evento": evento_id, "Rival": item.rival_id, "es_local": item.es_local, "lugar": item.lugar,
+                "marcador_local": item.marcador_local, "marcador_visitante": item.marcador_visitante,
+            }
+        elif item.tipo == 'Entrenamiento':
+            entrenamientos[evento_id] = {"evento": evento_id, **item.model_dump(include=set(_ENTRENAMIENTO_FIELDS))}
+    if partidos:
+        upsert_many(db, models.Partidos, list(partidos.values()), "uq_partidos_evento", update_fields=_PARTIDO_FIELDS)
+    if entrenamientos:
+        upsert_many(
+            db, models.Entrenamientos, list(entrenamientos.values()), "uq_entrenamientos_evento",
+            update_fields=_ENTRENAMIENTO_FIELDS
+        )
+    return [saved[i] for i in range(len(items))]
 
+def _guardar_eventos(db: Session, items: List[schemas.EventoCreateUpdate]):
+    try:
+        eventos = _escribir_eventos(db, items)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        # Moving an event onto a date and time that is already taken
+        if getattr(getattr(e.orig, "diag", None), "constraint_name", None) == "uq_eventos_fecha_hora":
+            raise HTTPException(status_code=409, detail="Another event already exists at that fecha and hora")
+        raise
+    return eventos
+
+@router.post("/crear_o_actualizar_evento", response_model=schemas.EventosBase, tags=["CustomOps"])
+def crear_o_actualizar_evento(obj_in: schemas.EventoCreateUpdate, db: Session = Depends(get_db)):
+    return _guardar_eventos(db, [obj_in])[0]
+
+@router.post("/crear_o_actualizar_evento/bulk", response_model=List[schemas.EventosBase], tags=["CustomOps"])
+def crear_o_actualizar_eventos(items: List[schemas.EventoCreateUpdate], db: Session = Depends(get_db)):
+    """Saves a whole week or month of events in one transaction."""
+    eventos = {}
+    for evento in _guardar_eventos(db, items):
+        eventos.setdefault(evento.id, evento)
+    return list(eventos.values())
+
+_MAX_TEMPORADA_DIAS = 400
+
+@router.post("/temporada/entrenamientos", response_model=schemas.TemporadaEntrenamientosResponse, tags=["CustomOps"])
+def crear_temporada_entrenamientos(obj_in: schemas.TemporadaEntrenamientosCreate, db: Session = Depends(get_db)):
+    if obj_in.fecha_fin < obj_in.fecha_inicio:
+        raise HTTPException(status_code=400, detail="fecha_fin must not be before fecha_inicio")
+    if (obj_in.fecha_fin - obj_in.fecha_inicio).days > _MAX_TEMPORADA_DIAS:
+        raise HTTPException(status_code=400, detail=f"The range cannot exceed {_MAX_TEMPORADA_DIAS} days")
+    if not obj_in.dias_semana or any(d not in range(7) for d in obj_in.dias_semana):
+        raise HTTPException(status_code=400, detail="dias_semana must contain values from 0 (lunes) to 6 (domingo)")
+    if obj_in.intervalo_semanas < 1:
+        raise HTTPException(status_code=400, detail="intervalo_semanas must be at least 1")
+
+    # Weeks are counted from the monday of fecha_inicio
+    primer_lunes = obj_in.fecha_inicio - timedelta(days=obj_in.fecha_inicio.weekday())
+    excluir = set(obj_in.excluir)
+    fechas = []
+    dia = obj_in.fecha_inicio
+    while dia <= obj_in.fecha_fin:
+        if (dia.weekday() in obj_in.dias_semana
+                and ((dia - primer_lunes).days // 7) % obj_in.intervalo_semanas == 0
+                and dia not in excluir):
+            fechas.append(dia)
+        dia += timedelta(days=1)
+
+    if obj_in.dry_run:
+        ocupadas = db.scalar(
+            select(func.count()).select_from(models.Eventos)
+            .where(models.Eventos.fecha.in_(fechas), models.Eventos.hora == obj_in.hora)
+        ) if fechas else 0
+        return {"dry_run": True, "fechas": fechas, "created": len(fechas) - ocupadas, "skipped": ocupadas}
+
+    # Slots that already have an event are left untouched, so re-running the
+    # same rule only fills the gaps.
+    eventos = {
+        str(uuid.uuid4()): {
+            "fecha": fecha, "hora": obj_in.hora, "tipo": "Entrenamiento",
+            "estado": obj_in.estado, "observaciones": obj_in.observaciones,
+        }
+        for fecha in fechas
+    }
+    nuevos = insert_many_ignore(
+        db, models.Eventos, [{"id": id_, **row} for id_, row in eventos.items()], "uq_eventos_fecha_hora"
+    )
+    detalle = obj_in.model_dump(include=set(_ENTRENAMIENTO_FIELDS))
+    insert_many_ignore(
+        db, models.Entrenamientos,
+        [{"id_entrenamiento": str(uuid.uuid4()), "evento": evento_id, **detalle} for evento_id in nuevos],
+        "uq_entrenamientos_evento"
+    )
     db.commit()
-    db.refresh(db_evento)
-    return db_evento
+    return {"dry_run": False, "fechas": fechas, "created": len(nuevos), "skipped": len(fechas) - len(nuevos)}
 
 # --- CRUD for PruebasFisicas ---
 @router.get("/pruebas_fisicas", response_model=List[schemas.PruebasFisicasResponse], tags=["PruebasFisicas"])
 @router.get("/pruebas_fisicas/", response_model=List[schemas.PruebasFisicasResponse], tags=["PruebasFisicas"])
-def read_pruebas_fisicas_list(skip: int = 0, limit: int = 1000, jugador_id: Optional[str] = None, db: Session = Depends(get_db)):
-    query = db.query(models.PruebasFisicas).options(joinedload(models.PruebasFisicas.jugadores))
+def read_pruebas_fisicas_list(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 1000,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    jugador_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    keys = (models.PruebasFisicas.fecha, models.PruebasFisicas.id)
+    schema = sparse_schema(schemas.PruebasFisicasResponse, fields)
+    cached = etag.check(db, request, response, models.PruebasFisicas, schema)
+    if cached is not None: return cached
+    query = sparse_query(db, models.PruebasFisicas, schema, keys=keys)
     if jugador_id:
         query = query.filter(models.PruebasFisicas.jugador_id == jugador_id)
-    return query.offset(skip).limit(limit).all()
+    return sparse_response(models.PruebasFisicas, schema, paginate(query, request, response, keys, cursor, skip, limit), response)
 
 @router.get("/pruebas_fisicas/{item_id}", response_model=schemas.PruebasFisicasResponse, tags=["PruebasFisicas"])
-def read_pruebas_fisicas(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.PruebasFisicas).options(joinedload(models.PruebasFisicas.jugadores)).filter(models.PruebasFisicas.id == item_id).first()
+def read_pruebas_fisicas(item_id: str, request: Request, response: Response, fields: Optional[str] = None, db: Session = Depends(get_db)):
+    schema = sparse_schema(schemas.PruebasFisicasResponse, fields)
+    cached = etag.check(db, request, response, models.PruebasFisicas, schema)
+    if cached is not None: return cached
+    item = sparse_query(db, models.PruebasFisicas, schema).filter(models.PruebasFisicas.id == item_id).first()
     if not item: raise HTTPException(status_code=404, detail="Item not found")
-    return item
+    return sparse_response(models.PruebasFisicas, schema, item, response)
 
 @router.post("/pruebas_fisicas", response_model=schemas.PruebasFisicasResponse, tags=["PruebasFisicas"])
 @router.post("/pruebas_fisicas/", response_model=schemas.PruebasFisicasResponse, tags=["PruebasFisicas"])
 def create_pruebas_fisicas(obj_in: schemas.PruebasFisicasCreate, db: Session = Depends(get_db)):
-    # Optional logic: check if there's already a test for the same player on the same date
-    existing = db.query(models.PruebasFisicas).filter(
-        models.PruebasFisicas.jugador_id == obj_in.jugador_id,
-        models.PruebasFisicas.fecha == obj_in.fecha
-    ).first()
-    
-    if existing:
-        update_data = obj_in.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            if field != "id":
-                setattr(existing, field, value)
-        db.commit()
-        db.refresh(existing)
-        return existing
-        
-    db_obj = models.PruebasFisicas(**obj_in.model_dump())
-    db.add(db_obj)
+    # One test session per player and date; a repeat only overwrites the fields sent
+    update_fields = [field for field in obj_in.model_dump(exclude_unset=True) if field != "id"]
+    db_obj = upsert(
+        db, models.PruebasFisicas, obj_in.model_dump(),
+        "uq_pruebas_fisicas_jugador_fecha", update_fields=update_fields
+    )
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 @router.put("/pruebas_fisicas/{item_id}", response_model=schemas.PruebasFisicasResponse, tags=["PruebasFisicas"])
 def update_pruebas_fisicas(item_id: str, obj_in: schemas.PruebasFisicasUpdate, db: Session = Depends(get_db)):
-    db_obj = db.query(models.PruebasFisicas).filter(models.PruebasFisicas.id == item_id).first()
-    if not db_obj:
-        raise HTTPException(status_code=404, detail="Item not found")
-    
-    update_data = obj_in.model_dump(exclude_unset=True)
-    for field in update_data:
-        setattr(db_obj, field, update_data[field])
-    
-    db.add(db_obj)
+    db_obj = update_by_id(db, models.PruebasFisicas, item_id, obj_in.model_dump(exclude_unset=True))
     db.commit()
-    db.refresh(db_obj)
     return db_obj
 
 @router.delete("/pruebas_fisicas/{item_id}", tags=["PruebasFisicas"])
 def delete_pruebas_fisicas(item_id: str, db: Session = Depends(get_db)):
-    item = db.query(models.PruebasFisicas).filter(models.PruebasFisicas.id == item_id).first()
-    if not item: raise HTTPException(status_code=404, detail="Item not found")
-    db.delete(item)
+    delete_by_id(db, models.PruebasFisicas, item_id)
     db.commit()
     return {"message": "Deleted successfully"}
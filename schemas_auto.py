@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict, AliasChoices
-from typing import Optional, Any, List
+from typing import Optional, Any, List, Dict
 from datetime import datetime, date, time
 
 # Clase base única para todos los esquemas para evitar problemas de MRO
@@ -21,6 +21,11 @@ class AsistenciaCreate(BaseModel):
 class AsistenciaUpdate(BaseModel):
     asistencia: str
 
+class AsistenciaBulkCreate(BaseModel):
+    # Compact form: one training and a {jugador_id: asistencia} map
+    entrenamiento_id: Any = Field(..., validation_alias=AliasChoices("entrenamiento_id", "entrenamiento"))
+    asistencias: Dict[str, str]
+
 class AsistenciaResponse(AsistenciaBase):
     entrenamientos: Optional['EntrenamientosConEventoResponse'] = None
     jugadores: Optional['JugadoresPropiosResponse'] = None
@@ -176,6 +181,27 @@ class EventoCreateUpdate(BaseModel):
     marcador_visitante: Optional[int] = None
     jornada: Optional[int] = None
 
+class TemporadaEntrenamientosCreate(BaseModel):
+    """Recurring trainings: every `dias_semana` (0 = lunes ... 6 = domingo) between both dates."""
+    fecha_inicio: date
+    fecha_fin: date
+    dias_semana: List[int]
+    hora: time
+    intervalo_semanas: int = 1 # 2 = every other week
+    excluir: List[date] = []
+    estado: Optional[str] = "Programado"
+    observaciones: Optional[str] = None
+    calentamiento: Optional[str] = None
+    trabajo_separado: Optional[str] = None
+    trabajo_conjunto: Optional[str] = None
+    dry_run: bool = False
+
+class TemporadaEntrenamientosResponse(BaseModel):
+    dry_run: bool
+    fechas: List[date]
+    created: int
+    skipped: int # dates that already had an event at that hora
+
 # --- PARTIDOS ---
 class PartidosBase(BaseSchema):
     id: Any
@@ -298,6 +324,18 @@ class EstadisticasJugadorCreate(BaseModel):
 class EstadisticasJugadorResponse(EstadisticasJugadorBase):
     pass
 
+class ActaBulkCreate(BaseModel):
+    """A whole match acta: the team stats row plus every player line."""
+    partido: Optional[str] = None
+    partido_externo: Optional[str] = None
+    estadisticas_partido: Optional[EstadisticasPartidoCreate] = None
+    jugadores: List[EstadisticasJugadorCreate] = []
+
+class ActaBulkResponse(BaseModel):
+    estadisticas_partido: Optional[EstadisticasPartidoResponse] = None
+    created: int
+    updated: int
+
 # --- ANALISIS PARTIDO ---
 class AnalisisPartidoBase(BaseSchema):
     id: Any
@@ -306,7 +344,8 @@ class AnalisisPartidoBase(BaseSchema):
     partido_externo: Optional[Any] = Field(None, validation_alias=AliasChoices("partido_externo", "partido_externo_id"), serialization_alias="partido_externo")
     video_url: Optional[str] = None
     video_offset_sec: Optional[int] = None
-    raw_json: Optional[Any] = None
+    # The document itself is served by GET /analisis_partido/{id}/raw_json
+    raw_json_etag: Optional[str] = None
 
 class AnalisisPartidoResponse(AnalisisPartidoBase):
     pass
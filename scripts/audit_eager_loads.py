@@ -0,0 +1,152 @@
+"""
+Lazy-load audit for the GET endpoints, without Postgres.
+
+Seeds an in-memory SQLite database with one linked row per models_auto
+table (every string primary and foreign key is "seed"), then calls every GET route of
+routers_auto — list routes with every relationship in `expand`, detail
+routes with item_id=seed — through a session where:
+  - top-level entity queries get raiseload("*"), so a relationship the
+    route did not load up front raises instead of loading;
+  - any lazy load that still reaches the database (a nested relationship
+    the loader options missed) raises as well.
+A failure there is the N+1 a large response would hit once per row. Also
+prints the loader options utils.fields derives for each response schema.
+
+    python scripts/audit_eager_loads.py [--verbose]
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import typing
+
+sys.path.append(os.getcwd())
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import raiseload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import main
+import models_auto as models
+import routers_auto
+from database import get_db
+from utils.fields import eager_options, relationships
+
+SEED = "seed"
+VALUES = {
+    str: "x", int: 1, float: 1.0, bool: True, dict: {}, list: [],
+    datetime.date: datetime.date(2026, 9, 1), datetime.time: datetime.time(19, 30),
+    datetime.datetime: datetime.datetime(2026, 9, 1, 19, 30),
+}
+
+
+class LazyLoad(Exception):
+    pass
+
+
+def setup():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    tables = [mapper.local_table for mapper in models.Base.registry.mappers if mapper.class_.__module__ == models.__name__]
+    tables = [table for table in models.Base.metadata.sorted_tables if table in tables]
+    models.Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as conn:
+        for table in tables:
+            row = {}
+            for column in table.columns:
+                if (column.primary_key or column.foreign_keys) and column.type.python_type is str:
+                    row[column.name] = SEED
+                elif not column.nullable and column.default is None and column.server_default is None:
+                    row[column.name] = VALUES.get(column.type.python_type, "x")
+            conn.execute(table.insert(), row)
+    return sessionmaker(bind=engine)
+
+
+def strict(Session_, loaded):
+    """Fails lazy loads; records the entity each top-level query reads in `loaded`."""
+    @event.listens_for(Session_, "do_orm_execute")
+    def _strict(state):
+        if state.lazy_loaded_from is not None:
+            raise LazyLoad(f"lazy load from {state.lazy_loaded_from.class_.__name__}")
+        if state.is_select and not state.is_relationship_load:
+            first = state.statement.column_descriptions[0]
+            if first.get("entity") is not None:
+                loaded.append(first["entity"])
+            # Column projections load no relationships
+            if first.get("entity") is not None and first.get("expr") is first["entity"]:
+                state.statement = state.statement.options(raiseload("*"))
+
+
+PREFIX = "/api/v1"
+
+
+def routes():
+    for route in routers_auto.router.routes:
+        # Routes without a response_model serialize no ORM objects
+        if isinstance(route, APIRoute) and "GET" in route.methods and route.response_model is not None:
+            yield route
+
+
+def response_schema(route):
+    args = typing.get_args(route.response_model)
+    return args[0] if args else route.response_model
+
+
+def expandable(client, path, schema, loaded):
+    """Every relationship a list route can expand, for the model it queries."""
+    loaded.clear()
+    client.get(path)
+    return ",".join(sorted({name for model in loaded for name in relationships(model, schema)}))
+
+
+def main_():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--verbose", action="store_true", help="print the derived loader options")
+    args = parser.parse_args()
+
+    Session_ = setup()
+    loaded = []
+    strict(Session_, loaded)
+
+    def session():
+        with Session_() as db:
+            yield db
+
+    main.app.dependency_overrides[get_db] = session
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    client = TestClient(main.app)
+    failures = 0
+    seen = set()
+    for route in routes():
+        path = PREFIX + route.path.replace("{item_id}", SEED)
+        if path.rstrip("/") in seen:
+            continue
+        seen.add(path.rstrip("/"))
+        schema = response_schema(route)
+        params = {}
+        if any(param.name == "expand" for param in route.dependant.query_params):
+            params["expand"] = expandable(client, path, schema, loaded)
+        loaded.clear()
+        try:
+            response = client.get(path, params=params)
+            ok, status = response.status_code == 200, str(response.status_code)
+        except Exception as exc:  # LazyLoad, or the raiseload error
+            while getattr(exc, "exceptions", None):  # middleware task groups
+                exc = exc.exceptions[0]
+            # pydantic reports the raiseload error inside its ValidationError
+            lines = f"{type(exc).__name__}: {exc}".splitlines()
+            ok, status = False, next((line.strip() for line in lines if "lazy" in line), lines[0]).split(" [type=")[0]
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} GET {path} {params.get('expand', '')} -> {status}")
+        if args.verbose:
+            for model in dict.fromkeys(loaded):
+                for option in eager_options(model, schema):
+                    print("       " + " -> ".join(str(prop) for prop in option.path[1::2]))
+    print(f"{failures} route(s) failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_()
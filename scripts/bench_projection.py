@@ -0,0 +1,97 @@
+"""
+ORM objects vs column projection for a list endpoint, without Postgres.
+
+Loads N EstadisticasJugador rows into an in-memory SQLite database, then
+renders List[EstadisticasJugadorResponse] from full ORM objects and from
+utils.projection rows. Reports time and peak Python memory (tracemalloc)
+for query + serialization, and checks both give the same JSON.
+
+    python scripts/bench_projection.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import List
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models_auto as models
+import schemas_auto as schemas
+from utils.projection import project, rows_response
+from utils.serialization import dump_json
+
+SCHEMA = List[schemas.EstadisticasJugadorResponse]
+
+
+def setup(n):
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.EstadisticasJugador.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.execute(models.EstadisticasJugador.__table__.insert(), [
+            dict(
+                id=str(uuid.uuid4()), partido=str(uuid.uuid4()), jugador=str(uuid.uuid4()),
+                nombre=f"Jugador {i}", equipo="local", dorsal=i % 23 + 1, ensayos=i % 3,
+                transformaciones=i % 2, penales=0, drops=0, tarjetas_amarillas=0, tarjetas_rojas=0,
+                es_capitan=i % 23 == 0, es_titular=i % 23 < 15, minutos_jugados=80, fue_convocado=True,
+            )
+            for i in range(n)
+        ])
+        db.commit()
+    return Session
+
+
+def render_orm(db):
+    return dump_json(SCHEMA, db.query(models.EstadisticasJugador).order_by(models.EstadisticasJugador.id).all())
+
+
+def render_projection(db):
+    query = project(db, models.EstadisticasJugador, schemas.EstadisticasJugadorResponse)
+    rows = query.order_by(models.EstadisticasJugador.id).all()
+    return rows_response(models.EstadisticasJugador, schemas.EstadisticasJugadorResponse, rows).body
+
+
+def measure(Session, render, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        with Session() as db:
+            start = time.perf_counter()
+            render(db)
+            best = min(best, time.perf_counter() - start)
+    with Session() as db:
+        tracemalloc.start()
+        render(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Session = setup(args.rows)
+    with Session() as db:
+        assert json.loads(render_orm(db)) == json.loads(render_projection(db)), "outputs differ"
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    results = [(name, *measure(Session, render, args.repeat))
+               for name, render in (("orm", render_orm), ("projection", render_projection))]
+    orm_time, orm_peak = results[0][1:]
+    for name, best, peak in results:
+        print(f"  {name:<11} {best * 1000:8.1f} ms  {args.rows / best:>10,.0f} rows/s  "
+              f"peak {peak / 2**20:6.1f} MiB  (x{orm_time / best:.1f} time, x{orm_peak / peak:.1f} memory)")
+
+
+if __name__ == "__main__":
+    main()
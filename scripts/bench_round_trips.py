@@ -0,0 +1,129 @@
+"""
+Counts the SQL statements and round-trip time of each write endpoint.
+
+Every request runs twice against the database in DATABASE_URL: once with
+the current session settings and once with expire_on_commit=True, which
+reproduces the old commit-then-refresh behaviour (serialising the response
+reloads the row). Everything runs inside an outer transaction that is
+rolled back at the end, so no data is left behind.
+
+    python scripts/bench_round_trips.py
+"""
+import os
+import sys
+import time
+import uuid
+from datetime import date
+
+sys.path.append(os.getcwd())
+
+from dotenv import load_dotenv
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+load_dotenv()
+
+import main
+import models
+from database import engine, get_db
+from dependencies import get_current_user
+
+TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def scenarios(state):
+    """(name, method, path, body) tuples; later ones reuse ids created earlier."""
+    suffix = uuid.uuid4().hex[:8]
+    return [
+        ("create jugador_propio", "post", "/api/v1/jugadores_propios",
+         lambda: {"nombre": "Bench", "apellidos": suffix}),
+        ("update jugador_propio", "put", lambda: f"/api/v1/jugadores_propios/{state['jugador_propio']}",
+         lambda: {"talla": "L"}),
+        ("create partido_externo", "post", "/api/v1/partidos_externos",
+         lambda: {"equipo_local": f"A{suffix}", "equipo_visitante": f"B{suffix}", "fecha": str(date.today())}),
+        ("update partido_externo", "put", lambda: f"/api/v1/partidos_externos/{state['partido_externo']}",
+         lambda: {"id": state["partido_externo"], "marcador_local": 10}),
+        ("create estadisticas_partido", "post", "/api/v1/estadisticas_partido",
+         lambda: {"partido_externo_id": state["partido_externo"], "marcador_local": 10}),
+        ("update estadisticas_partido", "put", lambda: f"/api/v1/estadisticas_partido/{state['estadisticas_partido']}",
+         lambda: {"marcador_visitante": 3}),
+        ("create pruebas_fisicas", "post", "/api/v1/pruebas_fisicas",
+         lambda: {"jugador_id": state["jugador_propio"], "fecha": str(date.today()), "velocidad_10m": 1.9}),
+        ("update pruebas_fisicas", "put", lambda: f"/api/v1/pruebas_fisicas/{state['pruebas_fisicas']}",
+         lambda: {"velocidad_30m": 4.2}),
+        ("update user_role", "post", "/api/v1/users/assign-role",
+         lambda: {"target_user_id": state["user"], "new_role": "STAFF"}),
+    ]
+
+
+def run(client, statements, state):
+    results = []
+    for name, method, path, body in scenarios(state):
+        path = path() if callable(path) else path
+        statements.clear()
+        start = time.perf_counter()
+        response = getattr(client, method)(path, json=body())
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code >= 400:
+            print(f"⚠️  {name}: {response.status_code} {response.text[:200]}")
+        payload = response.json()
+        if method == "post" and isinstance(payload, dict) and "id" in payload:
+            state[name.split(" ", 1)[1]] = payload["id"]
+        queries = [s for s in statements if not s.startswith(TRANSACTION_CONTROL)]
+        results.append((name, len(queries), elapsed))
+    return results
+
+
+def main_bench():
+    if not os.getenv("DATABASE_URL"):
+        print("❌ Error: DATABASE_URL not found in .env")
+        return
+
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement.lstrip().upper()))
+
+    connection = engine.connect()
+    outer = connection.begin()
+    try:
+        admin = models.User(email=f"bench-admin-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x",
+                            role=models.RoleEnum.ADMIN)
+        # One target per run so the second role change is not a no-op
+        targets = {
+            label: models.User(email=f"bench-{label}-{uuid.uuid4().hex[:8]}@example.com", hashed_password="x")
+            for label in ("now", "refresh")
+        }
+        setup = sessionmaker(bind=connection, expire_on_commit=False, join_transaction_mode="create_savepoint")()
+        setup.add_all([admin, *targets.values()])
+        setup.commit()
+
+        report = {}
+        for label, expire in (("now", False), ("refresh", True)):
+            factory = sessionmaker(bind=connection, autoflush=False, expire_on_commit=expire,
+                                   join_transaction_mode="create_savepoint")
+
+            def override_get_db():
+                db = factory()
+                try:
+                    yield db
+                finally:
+                    db.close()
+
+            main.app.dependency_overrides[get_db] = override_get_db
+            main.app.dependency_overrides[get_current_user] = lambda: admin
+            state = {"user": targets[label].id}
+            # No context manager: the startup hooks are not part of the benchmark
+            report[label] = run(TestClient(main.app), statements, state)
+    finally:
+        main.app.dependency_overrides.clear()
+        outer.rollback()
+        connection.close()
+
+    print(f"{'endpoint':<30}{'stmts':>7}{'ms':>9}{'stmts (refresh)':>17}{'ms':>9}")
+    for (name, count, ms), (_, old_count, old_ms) in zip(report["now"], report["refresh"]):
+        print(f"{name:<30}{count:>7}{ms:>9.1f}{old_count:>17}{old_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,93 @@
+"""
+Rows per second of the list-response serialization paths, without a database.
+
+Builds N transient EstadisticasJugador rows and renders them as
+List[EstadisticasJugadorResponse] three ways:
+  jsonable_encoder  validate, jsonable_encoder, json.dumps (older FastAPI)
+  dump_python       validate, dump to JSON-ready objects, json.dumps
+  json_response     utils.serialization: validate once, pydantic-core writes bytes
+and checks that all three produce the same JSON.
+
+    python scripts/bench_serialization.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from typing import List
+
+sys.path.append(os.getcwd())
+
+from fastapi.encoders import jsonable_encoder
+
+import models_auto as models
+import schemas_auto as schemas
+from utils.serialization import adapter, dump_json
+
+SCHEMA = List[schemas.EstadisticasJugadorResponse]
+
+
+def make_rows(n):
+    return [
+        models.EstadisticasJugador(
+            id=str(uuid.uuid4()), partido=str(uuid.uuid4()), jugador=str(uuid.uuid4()),
+            nombre=f"Jugador {i}", equipo="local", dorsal=i % 23 + 1, ensayos=i % 3,
+            transformaciones=i % 2, penales=0, drops=0, tarjetas_amarillas=0, tarjetas_rojas=0,
+            es_capitan=i % 23 == 0, es_titular=i % 23 < 15, minutos_jugados=80, fue_convocado=True,
+        )
+        for i in range(n)
+    ]
+
+
+def render_jsonable_encoder(rows):
+    type_adapter = adapter(SCHEMA)
+    content = jsonable_encoder(type_adapter.validate_python(rows, from_attributes=True), by_alias=True)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def render_dump_python(rows):
+    type_adapter = adapter(SCHEMA)
+    content = type_adapter.dump_python(
+        type_adapter.validate_python(rows, from_attributes=True), mode="json", by_alias=True
+    )
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def render_json_response(rows):
+    return dump_json(SCHEMA, rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    paths = [
+        ("jsonable_encoder", render_jsonable_encoder),
+        ("dump_python", render_dump_python),
+        ("json_response", render_json_response),
+    ]
+
+    outputs = {name: json.loads(render(rows)) for name, render in paths}
+    assert all(output == outputs["json_response"] for output in outputs.values()), "paths disagree"
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    baseline = None
+    for name, render in paths:
+        best = min(_timed(render, rows) for _ in range(args.repeat))
+        baseline = baseline or best
+        print(f"  {name:<17} {best * 1000:8.1f} ms  {args.rows / best:>10,.0f} rows/s  x{baseline / best:.1f}")
+
+
+def _timed(render, rows):
+    start = time.perf_counter()
+    render(rows)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
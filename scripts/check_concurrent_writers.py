@@ -0,0 +1,81 @@
+"""
+Checks that concurrent multi-table writers cannot block or deadlock each other.
+
+For each group of tables one transaction writes (eventos with partidos and
+entrenamientos, the acta bulk, borrar_datos_partido), two transactions
+write them in opposite orders, each waiting at a barrier after every
+statement so both hold whatever the first statement locked before either
+takes the next. The writes are UPDATE ... WHERE false: they change no rows
+but fire every statement-level trigger, which is where a per-table lock
+would come from (as the 0008 table_versions counters did). With
+lock_timeout set, a writer that has to wait fails instead of hanging.
+
+Needs Postgres at DATABASE_URL, migrated to head.
+
+    python scripts/check_concurrent_writers.py [--rounds N]
+"""
+import argparse
+import os
+import sys
+import threading
+
+sys.path.append(os.getcwd())
+
+from sqlalchemy import text
+
+from database import engine
+
+# Tables written in one transaction by the same request
+WRITE_GROUPS = [
+    ["eventos", "partidos", "entrenamientos"],
+    ["estadisticas_jugador", "estadisticas_partido"],
+    ["estadisticas_jugador", "estadisticas_partido", "analisis_partido", "partidos"],
+]
+
+
+def _writer(tables, barrier, errors):
+    try:
+        with engine.connect() as conn:
+            with conn.begin():
+                conn.execute(text("SET LOCAL lock_timeout = '3s'"))
+                for table in tables:
+                    conn.execute(text(f'UPDATE "{table}" SET id = id WHERE false'))
+                    barrier.wait()
+    except Exception as e:
+        barrier.abort()
+        errors.append(f"{' -> '.join(tables)}: {type(e).__name__}: {e}".splitlines()[0])
+
+
+def run(tables) -> list:
+    barrier = threading.Barrier(2, timeout=10)
+    errors = []
+    threads = [
+        threading.Thread(target=_writer, args=(order, barrier, errors))
+        for order in (tables, list(reversed(tables)))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    if engine.dialect.name != "postgresql":
+        sys.exit("DATABASE_URL must point at Postgres")
+
+    failures = 0
+    for tables in WRITE_GROUPS:
+        errors = [error for _ in range(args.rounds) for error in run(tables)]
+        failures += bool(errors)
+        print(f"{'FAIL' if errors else 'ok  '} {' + '.join(tables)}")
+        for error in errors:
+            print(f"     {error}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Cross-process cache invalidation over Postgres LISTEN/NOTIFY.
+
+A statement-level trigger on every API table (migration 0010) runs
+pg_notify('table_changes', '<table>') for every write statement, whoever
+makes it: routers_auto, main.py, scripts or manual SQL. Postgres delivers
+the notification when the writing transaction commits, and never for a
+rolled-back one.
+
+ChangeListener keeps one dedicated connection LISTENing from a daemon
+thread and hands each event to utils.ref_cache, which drops its copy of
+that table. After connecting or
+reconnecting, everything is invalidated, since events sent in between are
+lost. The connection must bypass transaction-mode poolers (pgbouncer, Neon's
+-pooler host), which do not support LISTEN: set CHANGE_FEED_DATABASE_URL to
+the direct host when DATABASE_URL goes through one.
+"""
+import logging
+import os
+import select
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from utils import ref_cache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "table_changes"
+ENABLED = os.getenv("CHANGE_FEED", "1") != "0"
+# Idle time after which the connection is pinged, to notice a dead socket
+KEEPALIVE_SECONDS = float(os.getenv("CHANGE_FEED_KEEPALIVE_SECONDS", "60"))
+RETRY_SECONDS = 5
+
+
+class ChangeListener:
+    def __init__(self, engine):
+        url = os.getenv("CHANGE_FEED_DATABASE_URL") or engine.url
+        self.engine = create_engine(url, poolclass=NullPool)
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+        self.received = 0
+
+    def start(self):
+        if not ENABLED or self.engine.dialect.name != "postgresql":
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning(f"Change feed disconnected, retrying in {RETRY_SECONDS}s: {e}")
+            self.connected = False
+            self._stop.wait(RETRY_SECONDS)
+
+    def _listen(self):
+        raw = self.engine.raw_connection()
+        try:
+            conn = raw.driver_connection
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            # Whatever changed while nobody was listening
+            ref_cache.invalidate_all()
+            self.connected = True
+            logger.info(f"Change feed listening on '{CHANNEL}'")
+            while not self._stop.is_set():
+                if select.select([conn], [], [], KEEPALIVE_SECONDS) == ([], [], []):
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                conn.poll()
+                while conn.notifies:
+                    self.dispatch(conn.notifies.pop(0).payload)
+        finally:
+            raw.close()
+
+    def dispatch(self, payload: str):
+        self.received += 1
+        # '<table>:<version>' from the 0009 trigger, until 0010 is applied
+        ref_cache.evict(payload.partition(":")[0])
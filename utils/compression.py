@@ -0,0 +1,197 @@
+"""
+Response compression negotiated from Accept-Encoding: zstd, br or gzip.
+
+CompressionMiddleware buffers complete responses (a single body message,
+which every JSON endpoint sends) and compresses them when they are at
+least MIN_SIZE bytes of JSON or text. The codec runs in a worker thread so
+a 10k-row list does not stall the event loop. brotli and zstd are used when
+their packages are installed; gzip is always available.
+
+Responses with an ETag are cacheable: their compressed bytes are kept in a
+small LRU keyed by (path, query, ETag, encoding), so the same version is
+compressed once. Their ETag is weakened (W/), as nginx does, since the
+bytes now depend on the encoding; If-None-Match checks compare weakly.
+Responses that already have a Content-Encoding or stream several body
+messages (files) pass through uncompressed. Every JSON/text response and
+every 304 carries Vary: Accept-Encoding, compressed or not, since shared
+caches must not hand one encoding to a client that asked for another.
+"""
+import gzip
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import anyio
+
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+CACHE_BYTES = int(os.getenv("COMPRESS_CACHE_BYTES", str(32 * 2**20)))
+
+COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript")
+
+# Server preference when the client accepts several with the same q
+CODECS: Dict[str, Callable[[bytes], bytes]] = {}
+try:
+    import zstandard
+
+    _zstd = zstandard.ZstdCompressor(level=3)
+    CODECS["zstd"] = _zstd.compress
+except ImportError:
+    pass
+try:
+    import brotli
+
+    CODECS["br"] = lambda body: brotli.compress(body, quality=4)
+except ImportError:
+    pass
+CODECS["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best available codec for an Accept-Encoding header, or None for identity."""
+    weights = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        name = name.strip().lower()
+        _, _, q = params.strip().partition("q=")
+        try:
+            weights[name] = float(q or 1)
+        except ValueError:
+            weights[name] = 1.0
+    best, best_q = None, 0.0
+    for name in CODECS:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressedCache:
+    """LRU of compressed bodies, bounded by their total size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+
+    def get(self, key) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is not None:
+            self._entries.move_to_end(key)
+        return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes // 4:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._entries[key] = body
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+cache = CompressedCache(CACHE_BYTES)
+
+
+def _compressible(headers) -> bool:
+    content_type = next((value for name, value in headers if name == b"content-type"), b"")
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return False
+    return not any(name == b"content-encoding" for name, _ in headers)
+
+
+def _varies(start) -> bool:
+    """
+    Whether the response depends on Accept-Encoding: any compressible content
+    type, whatever its size or this request's encoding, and every 304, whose
+    weak ETag stands for all encodings.
+    """
+    if start["status"] == 304:
+        return True
+    content_type = next((value for name, value in start["headers"] if name == b"content-type"), b"")
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _with_vary(headers) -> list:
+    vary = [value for name, value in headers if name == b"vary"]
+    if b"accept-encoding" in b",".join(vary).lower():
+        return list(headers)
+    vary.append(b"Accept-Encoding")
+    return [(name, value) for name, value in headers if name != b"vary"] + [(b"vary", b", ".join(vary))]
+
+
+def _vary_start(start):
+    return {**start, "headers": _with_vary(start["headers"])} if _varies(start) else start
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; see the module docstring."""
+
+    def __init__(self, app, min_size: int = MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = None
+        if scope["method"] != "HEAD":
+            encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+
+        start = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                if encoding is None:
+                    # Nothing to compress for this client, but caches must still vary
+                    await send(_vary_start(message))
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough or encoding is None:
+                await send(message)
+                return
+            if start is not None and (message.get("more_body", False) or not self._wanted(start, message)):
+                # Streamed, small or not compressible: send as it is
+                passthrough = True
+                await send(_vary_start(start))
+                start = None
+                await send(message)
+                return
+            await self._send_compressed(scope, start, message["body"], encoding, send)
+            start = None
+
+        await self.app(scope, receive, compressing_send)
+
+    def _wanted(self, start, message) -> bool:
+        return (
+            start["status"] not in (204, 304)
+            and len(message.get("body", b"")) >= self.min_size
+            and _compressible(start["headers"])
+        )
+
+    async def _send_compressed(self, scope, start, body: bytes, encoding: str, send):
+        headers = [(name, value) for name, value in start["headers"] if name != b"content-length"]
+        etag = next((value for name, value in headers if name == b"etag"), None)
+
+        key = (scope["path"], scope.get("query_string", b""), etag, encoding) if etag else None
+        compressed = cache.get(key) if key else None
+        if compressed is None:
+            compressed = await anyio.to_thread.run_sync(CODECS[encoding], body)
+            if key:
+                cache.put(key, compressed)
+
+        if etag is not None and not etag.startswith(b"W/"):
+            headers = [(name, b"W/" + value if name == b"etag" else value) for name, value in headers]
+        headers = _with_vary(headers) + [
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(len(compressed)).encode()),
+        ]
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
@@ -0,0 +1,172 @@
+from typing import Iterable, Optional, Sequence, Union
+
+from fastapi import HTTPException
+from sqlalchemy import column, delete, inspect, literal_column, update, values as values_clause
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+
+def _primary_keys(model):
+    return {column.key for column in inspect(model).primary_key}
+
+
+def upsert(
+    db: Session,
+    model,
+    values: dict,
+    conflict: Union[str, Sequence, None],
+    update_fields: Optional[Iterable[str]] = None,
+):
+    """
+    Writes one row with a single `INSERT ... ON CONFLICT DO UPDATE ... RETURNING`
+    and returns the mapped object, replacing the old SELECT-then-write pattern.
+
+    `conflict` is a unique constraint name or the list of index elements that
+    identify the natural key; with None the row is simply inserted.
+    `update_fields` defaults to every non primary key value supplied.
+    """
+    pks = _primary_keys(model)
+    # A None primary key means "generate one", as it did with the ORM constructor.
+    values = {k: v for k, v in values.items() if not (k in pks and v is None)}
+
+    stmt = insert(model).values(**values)
+    if conflict is not None:
+        if update_fields is None:
+            update_fields = [k for k in values if k not in pks]
+        set_ = {field: stmt.excluded[field] for field in update_fields}
+        target = {"constraint": conflict} if isinstance(conflict, str) else {"index_elements": conflict}
+        stmt = stmt.on_conflict_do_update(set_=set_, **target)
+
+    return db.scalars(
+        stmt.returning(model),
+        execution_options={"populate_existing": True},
+    ).one()
+
+
+_BATCH_SIZE = 1000
+
+
+def upsert_many(
+    db: Session,
+    model,
+    rows: Sequence[dict],
+    conflict: Union[str, Sequence],
+    update_fields: Iterable[str],
+):
+    """
+    Multi-row `INSERT ... ON CONFLICT DO UPDATE`, one statement per 1000 rows.
+    Rows must share the same keys and already be unique on the conflict key
+    (Postgres refuses to update the same row twice in one statement).
+    Returns (created, updated) counts.
+    """
+    update_fields = list(update_fields)
+    created = updated = 0
+    target = {"constraint": conflict} if isinstance(conflict, str) else {"index_elements": conflict}
+    for start in range(0, len(rows), _BATCH_SIZE):
+        stmt = insert(model.__table__).values(list(rows[start:start + _BATCH_SIZE]))
+        stmt = stmt.on_conflict_do_update(
+            set_={field: stmt.excluded[field] for field in update_fields}, **target
+        )
+        # xmax is 0 only for freshly inserted row versions
+        stmt = stmt.returning(literal_column("xmax = 0").label("inserted"))
+        for inserted in db.scalars(stmt):
+            if inserted:
+                created += 1
+            else:
+                updated += 1
+    return created, updated
+
+
+def insert_many_ignore(db: Session, model, rows: Sequence[dict], conflict: Union[str, Sequence]):
+    """
+    Multi-row `INSERT ... ON CONFLICT DO NOTHING`, 1000 rows per statement.
+    Returns the primary keys of the rows actually inserted.
+    """
+    target = {"constraint": conflict} if isinstance(conflict, str) else {"index_elements": conflict}
+    pk = inspect(model).primary_key[0]
+    inserted = []
+    for start in range(0, len(rows), _BATCH_SIZE):
+        stmt = (
+            insert(model.__table__)
+            .values(list(rows[start:start + _BATCH_SIZE]))
+            .on_conflict_do_nothing(**target)
+            .returning(pk)
+        )
+        inserted += db.scalars(stmt).all()
+    return inserted
+
+
+def upsert_many_returning(
+    db: Session,
+    model,
+    rows: Sequence[dict],
+    conflict: Union[str, Sequence],
+    update_fields: Iterable[str],
+):
+    """
+    Like upsert_many, but returns the written rows as mapped objects. The
+    order of the result is not guaranteed; match rows on their natural key.
+    """
+    update_fields = list(update_fields)
+    target = {"constraint": conflict} if isinstance(conflict, str) else {"index_elements": conflict}
+    objects = []
+    for start in range(0, len(rows), _BATCH_SIZE):
+        stmt = insert(model).values(list(rows[start:start + _BATCH_SIZE]))
+        stmt = stmt.on_conflict_do_update(
+            set_={field: stmt.excluded[field] for field in update_fields}, **target
+        )
+        objects += db.scalars(
+            stmt.returning(model), execution_options={"populate_existing": True}
+        ).all()
+    return objects
+
+
+def update_many_by_id(db: Session, model, rows: Sequence[dict], fields: Sequence[str]):
+    """
+    Updates several rows by primary key with one `UPDATE ... FROM (VALUES ...)`
+    and returns the ones that existed.
+    """
+    table = model.__table__
+    pk = inspect(model).primary_key[0]
+    keys = [pk.key, *fields]
+    data = values_clause(*(column(key, table.c[key].type) for key in keys), name="v").data(
+        [tuple(row[key] for key in keys) for row in rows]
+    )
+    stmt = (
+        update(model)
+        .where(pk == data.c[pk.key])
+        .values({field: data.c[field] for field in fields})
+        .returning(model)
+    )
+    return db.scalars(
+        stmt, execution_options={"populate_existing": True, "synchronize_session": False}
+    ).all()
+
+
+def _by_id(model, item_id):
+    return inspect(model).primary_key[0] == item_id
+
+
+def update_by_id(db: Session, model, item_id, values: dict, detail: str = "Item not found"):
+    """
+    `UPDATE ... WHERE id = :id RETURNING *` without loading the row first.
+    Raises 404 when no row matches.
+    """
+    if not values:
+        obj = db.get(model, item_id)
+    else:
+        stmt = update(model).where(_by_id(model, item_id)).values(**values).returning(model)
+        obj = db.scalars(stmt, execution_options={"populate_existing": True}).one_or_none()
+    if obj is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return obj
+
+
+def delete_by_id(db: Session, model, item_id, detail: str = "Item not found"):
+    """`DELETE ... WHERE id = :id`; raises 404 when no row matches."""
+    result = db.execute(
+        delete(model).where(_by_id(model, item_id)),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail=detail)
@@ -0,0 +1,143 @@
+"""
+Stops database work for GET requests whose client has gone away.
+
+CancelOnDisconnectMiddleware listens for `http.disconnect` while the request
+is being handled. When it arrives, the statement running on the request's
+connection is cancelled (the driver's cancel request, as pg_cancel_backend
+does) and any further statement on that session raises ClientDisconnected,
+which also stops lazy loads triggered while serialising the response.
+Nothing is sent back to the client once it is gone.
+"""
+import logging
+import math
+import threading
+from typing import Optional
+
+import anyio
+from fastapi import Request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_STATE_KEY = "disconnect_handle"
+
+# Not a real HTTP status; nginx uses it for "client closed request".
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+class DisconnectHandle:
+    """Connections in use by one request, so they can be cancelled from the event loop."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.disconnected = False
+        self.completed = False
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def register(self, dbapi_connection):
+        with self._lock:
+            self._connections.add(dbapi_connection)
+
+    def unregister(self, dbapi_connection):
+        # Holding the lock here means a cancel can never reach a connection
+        # that is already back in the pool serving another request.
+        with self._lock:
+            self._connections.discard(dbapi_connection)
+
+    def cancel(self):
+        with self._lock:
+            self.disconnected = True
+            for dbapi_connection in self._connections:
+                try:
+                    dbapi_connection.cancel()
+                except Exception as e:
+                    logger.warning(f"Could not cancel query for {self.path}: {e}")
+            cancelled = len(self._connections)
+        if cancelled:
+            logger.info(f"Client disconnected, cancelled {cancelled} running query(s): {self.path}")
+
+
+def _handle(request: Request) -> Optional[DisconnectHandle]:
+    return request.scope.get("state", {}).get(_STATE_KEY)
+
+
+def attach(db, request: Request):
+    handle = _handle(request)
+    if handle is not None:
+        db.info[_STATE_KEY] = handle
+
+
+def is_disconnected(request: Request) -> bool:
+    handle = _handle(request)
+    return handle is not None and handle.disconnected
+
+
+def install(engine, session_factory):
+    @event.listens_for(session_factory, "after_begin")
+    def track_connection(session, transaction, connection):
+        handle: Optional[DisconnectHandle] = session.info.get(_STATE_KEY)
+        if handle is None:
+            return
+        if handle.disconnected:
+            raise ClientDisconnected(handle.path)
+        connection.info[_STATE_KEY] = handle
+        handle.register(connection.connection.dbapi_connection)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def refuse_after_disconnect(conn, cursor, statement, parameters, context, executemany):
+        handle: Optional[DisconnectHandle] = conn.info.get(_STATE_KEY)
+        if handle is not None and handle.disconnected:
+            raise ClientDisconnected(handle.path)
+
+    @event.listens_for(engine, "checkin")
+    def untrack_connection(dbapi_connection, connection_record):
+        handle: Optional[DisconnectHandle] = connection_record.info.pop(_STATE_KEY, None)
+        if handle is not None:
+            handle.unregister(dbapi_connection)
+
+
+class CancelOnDisconnectMiddleware:
+    """Pure ASGI middleware; only GET/HEAD, whose bodies are never read."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        handle = DisconnectHandle(scope["path"])
+        scope.setdefault("state", {})[_STATE_KEY] = handle
+        # The watcher owns the real receive(); the app reads what it forwards.
+        forward, inbox = anyio.create_memory_object_stream(math.inf)
+
+        async def watch():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    if not handle.completed:
+                        # dbapi cancel() blocks on a socket round trip
+                        await anyio.to_thread.run_sync(handle.cancel)
+                    await forward.send(message)
+                    return
+                await forward.send(message)
+
+        async def guarded_send(message):
+            if handle.disconnected:
+                return
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                handle.completed = True
+            await send(message)
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(watch)
+            try:
+                await self.app(scope, inbox.receive, guarded_send)
+            finally:
+                tg.cancel_scope.cancel()
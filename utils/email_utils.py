@@ -1,6 +1,5 @@
 import os
-import sib_api_v3_sdk
-from sib_api_v3_sdk.rest import ApiException
+from functools import lru_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -8,9 +7,19 @@ load_dotenv()
 # Email Configuration
 BREVO_API_KEY = os.getenv("BREVO_API_KEY", "")
 
-# Configure API key authorization: api-key
-configuration = sib_api_v3_sdk.Configuration()
-configuration.api_key['api-key'] = BREVO_API_KEY
+@lru_cache(maxsize=1)
+def _brevo_sdk():
+    """
+    Imports and configures the Brevo SDK on first use; it loads hundreds of
+    generated model modules, which is most of the app's import time.
+    """
+    import sib_api_v3_sdk
+    from sib_api_v3_sdk.rest import ApiException
+
+    # Configure API key authorization: api-key
+    configuration = sib_api_v3_sdk.Configuration()
+    configuration.api_key['api-key'] = BREVO_API_KEY
+    return sib_api_v3_sdk, configuration, ApiException
 
 APP_NAME = "RCLH S16 Rugby App"
 FRONTEND_URL = os.getenv("FRONTEND_URL", "https://s16-nine.vercel.app")
@@ -89,6 +98,7 @@ def send_password_reset_email(to_email: str, token: str, user_name: str = "amigo
         print(f"DEBUG: Password Reset Link: {reset_link}")
         return False
 
+    sib_api_v3_sdk, configuration, ApiException = _brevo_sdk()
     api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
     
     send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
@@ -186,6 +196,7 @@ def send_activation_email(to_email: str, token: str):
         print(f"DEBUG: Activation Link: {activation_link}")
         return False
 
+    sib_api_v3_sdk, configuration, ApiException = _brevo_sdk()
     api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
     
     send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
@@ -0,0 +1,108 @@
+"""
+Conditional GETs for the list and detail endpoints.
+
+A response's ETag hashes the URL with a version of every table it reads
+(the model's own plus those of the relationships left in its schema, at any
+depth), so check() costs one catalog lookup and, when If-None-Match still
+matches, the handler returns 304 before building its query.
+
+A table's version is the write counter Postgres already keeps in
+pg_stat_user_tables (rows inserted + updated + deleted), with its file node
+(which TRUNCATE replaces) and the server's start and stats-reset times.
+Reading it takes no locks and writers do nothing extra. Backends publish
+these counters after commit, at most about once a second, so a 304 can lag
+a write by that long; they never run ahead of committed data. Other
+databases (sqlite in local runs) have no counters: no ETag is sent.
+
+The versions are read before the data, so a write landing in between can
+only pair new data with the old tag, which the next request refreshes.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import bindparam, inspect, text
+
+from utils.fields import nested_schema, relationships
+
+# Clients keep their copy but revalidate it on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def matches(request: Request, tag: Optional[str]) -> bool:
+    """If-None-Match against `tag`, compared weakly (compressed responses carry W/ tags)."""
+    if tag is None:
+        return False
+    tags = [value.strip() for value in request.headers.get("if-none-match", "").split(",")]
+    tag = tag[2:] if tag.startswith("W/") else tag
+    return "*" in tags or tag in (value[2:] if value.startswith("W/") else value for value in tags)
+
+
+def _tables(model, schema, path):
+    yield model.__table__.name
+    mapper = inspect(model)
+    for name, key in relationships(model, schema).items():
+        target = mapper.relationships[key].mapper.class_
+        nested = nested_schema(schema.model_fields[name].annotation)
+        if nested is not None and (target, nested) not in path:
+            yield from _tables(target, nested, path | {(model, schema)})
+        else:
+            yield target.__table__.name
+
+
+@lru_cache(maxsize=None)
+def tables_for(model, schema) -> tuple:
+    """Tables whose rows end up in a `schema` response built from `model`."""
+    return tuple(sorted(set(_tables(model, schema, frozenset()))))
+
+
+_VERSIONS = text("""
+    SELECT s.relname, concat_ws(
+        '.', pg_relation_filenode(s.relid), s.n_tup_ins + s.n_tup_upd + s.n_tup_del,
+        extract(epoch FROM pg_postmaster_start_time()), extract(epoch FROM d.stats_reset)
+    )
+    FROM pg_stat_user_tables s, pg_stat_database d
+    WHERE d.datname = current_database() AND s.schemaname = current_schema() AND s.relname IN :tables
+""").bindparams(bindparam("tables", expanding=True))
+
+
+def versions(db, tables: Iterable[str]) -> Optional[List[Tuple[str, str]]]:
+    """(table, version) pairs, or None where the database keeps no write counters."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    return db.execute(_VERSIONS, {"tables": list(tables)}).all()
+
+
+def make_tag(request: Request, table_versions: Optional[Iterable[Tuple[str, object]]]) -> Optional[str]:
+    if table_versions is None:
+        return None
+    key = f"{request.url.path}?{request.url.query}|" + ",".join(f"{name}:{version}" for name, version in sorted(table_versions))
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def current(db, request: Request, model, schema) -> Optional[str]:
+    return make_tag(request, versions(db, tables_for(model, schema)))
+
+
+def not_modified(tag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": tag, "Cache-Control": CACHE_CONTROL})
+
+
+def check(db, request: Request, response: Response, model, schema) -> Optional[Response]:
+    """
+    The 304 to return when the client's copy is current; otherwise None,
+    after setting ETag and Cache-Control on `response` for the full answer.
+    """
+    return conditional(request, response, current(db, request, model, schema))
+
+
+def conditional(request: Request, response: Response, tag: Optional[str]) -> Optional[Response]:
+    """check() for an already computed tag; None (no versions) sends no ETag."""
+    if tag is None:
+        return None
+    if matches(request, tag):
+        return not_modified(tag)
+    response.headers["ETag"] = tag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
@@ -0,0 +1,159 @@
+"""
+Sparse fieldsets and relationship expansion on list and detail endpoints:
+`?fields=id,fecha,hora,tipo` and `?expand=partido,entrenamiento`.
+
+sparse_schema() turns the request into a copy of the response schema with
+only the wanted fields (cached per combination), and the SQL and the JSON
+both follow it:
+- sparse_query() selects plain columns (utils.projection) when every field
+  is a column; otherwise it loads ORM objects, restricted with load_only()
+  when fields were picked, and eager-loads exactly the relationships left in
+  the schema: joinedload for many-to-one, selectinload for collections so
+  parent rows are not multiplied. Nested schemas are walked as well, so
+  their relationships are loaded by chained options instead of lazily;
+- sparse_response() renders with whichever serializer matches the query.
+Endpoints that pass `model` leave relationships out unless expanded (or
+named in `fields`); without parameters the others behave as before. Only
+top-level fields can be picked; nested objects come back whole.
+"""
+import typing
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, create_model
+from pydantic_core import to_json
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from utils.projection import attribute_names, column_for, project, projectable, projection, rows_response
+from utils.serialization import bytes_response, dump_json, json_response
+
+# Sparse copies, mapped to the schema they were cut from
+_sparse_of = {}
+
+
+@lru_cache(maxsize=None)
+def _subset(schema, names: frozenset):
+    if names == frozenset(schema.model_fields):
+        return schema
+    fields = {name: (field.annotation, field) for name, field in schema.model_fields.items() if name in names}
+    subset = create_model(
+        schema.__name__, __config__=schema.model_config, __module__=schema.__module__, **fields
+    )
+    _sparse_of[subset] = schema
+    return subset
+
+
+def _parse(schema, value: str, param: str) -> set:
+    """Field names for a comma-separated list of names or output aliases."""
+    by_output = {field.serialization_alias or name: name for name, field in schema.model_fields.items()}
+    names, unknown = set(), []
+    for requested in (name.strip() for name in value.split(",")):
+        if not requested:
+            continue
+        name = requested if requested in schema.model_fields else by_output.get(requested)
+        if name is None:
+            unknown.append(requested)
+        else:
+            names.add(name)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown {param}: {', '.join(sorted(unknown))}")
+    return names
+
+
+@lru_cache(maxsize=None)
+def relationships(model, schema) -> Dict[str, str]:
+    """Schema fields backed by a relationship of `model`, mapped to its key."""
+    keys = set(inspect(model).relationships.keys())
+    result = {}
+    for name, field in schema.model_fields.items():
+        key = next((c for c in attribute_names(name, field) if c in keys), None)
+        if key is not None:
+            result[name] = key
+    return result
+
+
+def sparse_schema(schema, fields: Optional[str] = None, expand: Optional[str] = None, model=None):
+    """
+    `schema` narrowed to `fields`. With `model`, relationship fields are
+    dropped unless listed in `expand` or named in `fields`.
+    """
+    names = set(schema.model_fields)
+    expanded = set()
+    if model is not None:
+        related = set(relationships(model, schema))
+        if expand and expand.strip():
+            expanded = _parse(schema, expand, "expand")
+            if expanded - related:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Cannot expand: {', '.join(sorted(expanded - related))}; expandable: {', '.join(sorted(related))}",
+                )
+        names -= related - expanded
+    if fields and fields.strip():
+        names = _parse(schema, fields, "fields") | expanded
+    return _subset(schema, frozenset(names))
+
+
+def nested_schema(annotation):
+    """The response model inside Optional[X] / List[X] / Optional[List[X]], if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        found = nested_schema(arg)
+        if found is not None:
+            return found
+    return None
+
+
+def _walk(model, schema, parent, path):
+    mapper = inspect(model)
+    for name, key in relationships(model, schema).items():
+        relationship = mapper.relationships[key]
+        attr = getattr(model, key)
+        # Collections in a second SELECT ... IN so parent rows are not multiplied
+        if parent is None:
+            option = selectinload(attr) if relationship.uselist else joinedload(attr)
+        else:
+            option = parent.selectinload(attr) if relationship.uselist else parent.joinedload(attr)
+        nested = nested_schema(schema.model_fields[name].annotation)
+        target = relationship.mapper.class_
+        children = []
+        if nested is not None and (target, nested) not in path:
+            children = list(_walk(target, nested, option, path | {(model, schema)}))
+        # A chained option also loads every step before it
+        yield from children or [option]
+
+
+@lru_cache(maxsize=None)
+def eager_options(model, schema) -> tuple:
+    """
+    Loader options for every relationship `schema` serializes, at any depth,
+    so rendering the response never triggers a lazy load.
+    """
+    return tuple(_walk(model, schema, None, frozenset()))
+
+
+def sparse_query(db, model, schema, keys: Sequence = ()):
+    """Query for `schema`; `keys` are the keyset sort keys, always selected."""
+    if projectable(model, schema):
+        return project(db, model, schema, *keys)
+    options = list(eager_options(model, schema))
+    if schema in _sparse_of:
+        wanted = [column_for(model, name, field) for name, field in schema.model_fields.items()]
+        options.append(load_only(*(column for column in wanted if column is not None), *keys))
+    return db.query(model).options(*options)
+
+
+def sparse_response(model, schema, content, response: Optional[Response] = None) -> Response:
+    """Renders what sparse_query() returned: a list of rows/objects or a single one."""
+    many = isinstance(content, list)
+    if not projectable(model, schema):
+        return json_response(List[schema] if many else schema, content, response)
+    if many:
+        return rows_response(model, schema, content, response)
+    shape = projection(model, schema)
+    if shape.direct:
+        return bytes_response(to_json(dict(zip(shape.names, content))), response)
+    return bytes_response(dump_json(schema, content), response)
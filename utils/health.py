@@ -0,0 +1,152 @@
+"""
+Cached health information for the probe and diagnostic endpoints.
+
+A daemon thread refreshes the database, table list and email-provider checks
+every HEALTH_REFRESH_SECONDS; the endpoints only read the last snapshot, so
+probes never open connections or sockets on the request path. The same thread
+compares the database's Alembic revision with the migration head, which
+replaces running create_all on every boot.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = float(os.getenv("HEALTH_REFRESH_SECONDS", "30"))
+# A snapshot older than this means the refresher itself is stuck.
+STALE_AFTER_SECONDS = REFRESH_SECONDS * 3
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+EMAIL_API_HOST = "api.brevo.com"
+SMTP_HOST = "smtp.gmail.com"
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _probe_port(host: str, port: int, timeout: float = 3) -> str:
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            result = s.connect_ex((host, port))
+        return "OPEN" if result == 0 else f"CLOSED (code {result})"
+    except Exception as e:
+        return f"ERROR: {e}"
+
+
+class HealthMonitor:
+    def __init__(self, engine):
+        self.engine = engine
+        self._stop = threading.Event()
+        self._thread = None
+        self.database = {"status": "unknown"}
+        self.tables = {"tables": [], "checked_at": None}
+        self.email = {"status": "unknown"}
+        self.schema = {"status": "unknown"}
+        self.refreshed_at = None
+        # Set by utils.warmup once pools and caches are primed
+        self.warmed = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(REFRESH_SECONDS)
+
+    def refresh(self):
+        self._check_database()
+        # Migrations run once per deploy, before its replicas start, so one match is enough
+        if self.database["status"] == "ok" and self.schema["status"] != "ok":
+            self._check_schema()
+        self._check_email()
+        self.refreshed_at = time.monotonic()
+
+    def _check_database(self):
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                tables = inspect(conn).get_table_names()
+            self.database = {
+                "status": "ok",
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                "checked_at": _now(),
+            }
+            self.tables = {"tables": tables, "checked_at": _now()}
+        except Exception as e:
+            logger.error(f"Health check: database unreachable: {e}")
+            self.database = {"status": f"error: {e}", "checked_at": _now()}
+
+    def _check_schema(self):
+        try:
+            from alembic.config import Config
+            from alembic.script import ScriptDirectory
+
+            head = ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+            with self.engine.connect() as conn:
+                current = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+            if current == head:
+                self.schema = {"status": "ok", "revision": current}
+            else:
+                logger.error(f"Database schema is at {current}, expected {head}; run 'alembic upgrade head'")
+                self.schema = {"status": "outdated", "revision": current, "head": head}
+        except Exception as e:
+            logger.error(f"Health check: could not read the schema version: {e}")
+            self.schema = {"status": f"error: {e}"}
+
+    def _check_email(self):
+        from utils import email_utils
+
+        api = _probe_port(EMAIL_API_HOST, 443)
+        self.email = {
+            "status": "ok" if api == "OPEN" and email_utils.BREVO_API_KEY else "degraded",
+            "provider": "Brevo API",
+            "api_reachable": api,
+            "has_key": bool(email_utils.BREVO_API_KEY),
+            # SMTP is no longer used, kept for the diagnostic endpoint
+            "smtp": {f"port_{port}": _probe_port(SMTP_HOST, port) for port in (465, 587)},
+            "checked_at": _now(),
+        }
+
+    def pool(self):
+        pool = self.engine.pool
+        stats = {"status": pool.status()}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        return stats
+
+    def is_stale(self):
+        return self.refreshed_at is None or time.monotonic() - self.refreshed_at > STALE_AFTER_SECONDS
+
+    def readiness(self):
+        ready = (
+            self.database.get("status") == "ok"
+            and self.schema.get("status") == "ok"
+            and self.warmed
+            and not self.is_stale()
+        )
+        return ready, {
+            "status": "ready" if ready else "not ready",
+            "database": self.database,
+            "schema": self.schema,
+            "warmed": self.warmed,
+            "pool": self.pool(),
+            "email": {k: v for k, v in self.email.items() if k != "smtp"},
+            "stale": self.is_stale(),
+        }
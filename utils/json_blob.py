@@ -0,0 +1,63 @@
+"""
+Large JSON documents stored gzip-compressed next to their row.
+
+AnalisisPartido.raw_json (the video-analysis export) can be megabytes, so it
+is no longer part of any list or nested response. Writers pack() it once:
+the compact JSON is gzipped (fixed mtime, so equal documents give equal
+bytes) and hashed into an ETag, both stored with the row. blob_response()
+then serves the stored bytes as they are to clients that accept gzip,
+answers If-None-Match with 304 and only decompresses for the rest.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic_core import to_json
+
+from utils.etag import CACHE_CONTROL, matches
+
+
+def encode(value: Any) -> bytes:
+    """Compact JSON for `value`; strings holding JSON text (old writers sent json.dumps output) are parsed first."""
+    if isinstance(value, (str, bytes)):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+    return to_json(value)
+
+
+def pack(value: Any) -> Tuple[Optional[bytes], Optional[str]]:
+    """(gzip bytes, ETag) to store for `value`; (None, None) clears it."""
+    if value is None:
+        return None, None
+    body = encode(value)
+    return gzip.compress(body, compresslevel=6, mtime=0), etag_for(body)
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            _, _, q = params.strip().partition("q=")
+            try:
+                return float(q or 1) > 0
+            except ValueError:
+                return True
+    return False
+
+
+def blob_response(request: Request, gz: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=gz, media_type="application/json", headers=headers)
+    return Response(content=gzip.decompress(gz), media_type="application/json", headers=headers)
@@ -0,0 +1,95 @@
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import and_, or_, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (date, datetime, time):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(row, keys: Sequence) -> str:
+    """
+    Builds the opaque token pointing right after `row` for the given sort keys.
+    """
+    values = [_encode_value(getattr(row, key.key)) for key in keys]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, keys: Sequence) -> list:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match the sort key")
+        return [_decode_value(key, value) for key, value in zip(keys, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _seek_condition(keys: Sequence, values: list):
+    """
+    Rows after `values` in `(k1, ..., kn)` order, NULLs last as Postgres sorts
+    them ascending. A non-null k1 gives the row-value comparison
+    `(k1, ..., kn) > (v1, ..., vn)`, a single range scan on the (k1, ..., kn)
+    index, plus the NULL tail of k1. Only k1 may be nullable; the last key
+    must be the primary key so the ordering is total.
+    """
+    key, value = keys[0], values[0]
+    if len(keys) == 1:
+        return key > value
+    if value is None:
+        return and_(key.is_(None), _seek_condition(keys[1:], values[1:]))
+    return or_(tuple_(*keys) > tuple_(*values), key.is_(None))
+
+
+def paginate(
+    query,
+    request: Request,
+    response: Response,
+    keys: Sequence,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+):
+    """
+    Applies the legacy offset pagination, or keyset pagination when the client
+    sends `cursor` (empty for the first page). In keyset mode the next page is
+    advertised through the `Link` and `X-Next-Cursor` headers, and every page
+    costs the same index range scan no matter how deep it is.
+    """
+    if cursor is None:
+        return query.offset(skip).limit(limit).all()
+
+    query = query.order_by(*keys)
+    if cursor:
+        query = query.filter(_seek_condition(keys, decode_cursor(cursor, keys)))
+
+    items = query.limit(limit + 1).all()
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1], keys)
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
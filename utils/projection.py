@@ -0,0 +1,104 @@
+"""
+Column projections for list endpoints whose response schema is flat.
+
+Instead of hydrating a full ORM object (identity map entry, attribute
+state, relationship loaders) per row, project() selects only the columns
+behind the schema's fields and returns plain Row tuples, which paginate()
+handles like ORM objects. When every column already has the Python type of
+its field, rows_response() writes the tuples to JSON directly; otherwise
+they are validated against the schema first, as json_response() does.
+"""
+import typing
+from functools import lru_cache
+from typing import Any, List, NamedTuple, Optional
+
+from fastapi import Response
+from pydantic import AliasChoices
+from pydantic_core import to_json
+from sqlalchemy import inspect
+
+from utils.serialization import bytes_response, dump_json
+
+
+class Projection(NamedTuple):
+    columns: tuple
+    names: tuple  # output keys (serialization aliases), parallel to columns
+    direct: bool  # rows can be dumped without validation
+
+
+def attribute_names(name, field):
+    """Model attribute names a schema field can be read from (name, then validation aliases)."""
+    alias = field.validation_alias
+    if isinstance(alias, AliasChoices):
+        return [name, *(choice for choice in alias.choices if isinstance(choice, str))]
+    if isinstance(alias, str):
+        return [name, alias]
+    return [name]
+
+
+def column_for(model, name, field):
+    """The model column behind a schema field (by name or validation alias), if any."""
+    attrs = {attr.key for attr in inspect(model).column_attrs}
+    key = next((c for c in attribute_names(name, field) if c in attrs), None)
+    return getattr(model, key) if key is not None else None
+
+
+def _same_type(annotation, column) -> bool:
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+    if annotation is Any:
+        return True
+    try:
+        return annotation is column.type.python_type
+    except NotImplementedError:
+        return False
+
+
+@lru_cache(maxsize=None)
+def projection(model, schema) -> Projection:
+    """
+    Model columns backing the fields of `schema`, in field order. Fields the
+    model has no attribute for keep their default, as with ORM objects; a
+    relationship or other non-column attribute makes the schema unprojectable.
+    """
+    columns, names, direct = [], [], True
+    for name, field in schema.model_fields.items():
+        column = column_for(model, name, field)
+        if column is None:
+            if any(hasattr(model, c) for c in attribute_names(name, field)) or field.is_required():
+                raise TypeError(f"{schema.__name__}.{name} is not a column of {model.__name__}")
+            direct = False
+            continue
+        columns.append(column)
+        names.append(field.serialization_alias or name)
+        direct = direct and _same_type(field.annotation, column)
+    return Projection(tuple(columns), tuple(names), direct)
+
+
+@lru_cache(maxsize=None)
+def projectable(model, schema) -> bool:
+    try:
+        projection(model, schema)
+        return True
+    except TypeError:
+        return False
+
+
+def project(db, model, schema, *extra):
+    """
+    Query of plain rows with the columns `schema` needs, plus `extra`
+    (e.g. the keyset sort keys, which must be readable on each row).
+    """
+    selected = projection(model, schema).columns
+    keys = {column.key for column in selected}
+    return db.query(*selected, *(column for column in extra if column.key not in keys))
+
+
+def rows_response(model, schema, rows, response: Optional[Response] = None) -> Response:
+    """Renders rows from project() as List[schema]."""
+    shape = projection(model, schema)
+    if not shape.direct:
+        return bytes_response(dump_json(List[schema], rows), response)
+    # zip() stops at the schema's columns, dropping any extra sort keys
+    return bytes_response(to_json([dict(zip(shape.names, row)) for row in rows]), response)
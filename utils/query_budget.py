@@ -0,0 +1,147 @@
+"""
+Per-request database limits.
+
+Every transaction starts with SET LOCAL statement_timeout, so a runaway
+query is cancelled by Postgres instead of holding the connection. It is set
+per transaction rather than once per connection because DATABASE_URL goes
+through Neon's pgbouncer in transaction mode, where a session-level SET
+stays on whichever server connection ran it. Routes listed in ROUTE_BUDGETS
+get their own timeout for their transactions.
+
+Each request also has a budget of statements and of accumulated DB time,
+checked before every statement: once it is spent, the next statement is
+refused with QueryBudgetExceeded. That check cannot interrupt a statement
+already running, so a single slow query is bounded only by
+statement_timeout; the DB-time budget stops a request that keeps issuing
+queries after it has used up its allowance.
+"""
+import os
+import time
+from typing import NamedTuple, Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+
+_STATE_KEY = "query_budget"
+_START_KEY = "query_budget_start"
+
+# Postgres "query_canceled", raised when statement_timeout fires
+QUERY_CANCELED = "57014"
+
+
+class Budget(NamedTuple):
+    statement_timeout_ms: int
+    max_queries: int
+    max_db_time_ms: int
+
+
+DEFAULT_BUDGET = Budget(
+    statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000")),
+    max_queries=int(os.getenv("DB_MAX_QUERIES_PER_REQUEST", "200")),
+    max_db_time_ms=int(os.getenv("DB_MAX_TIME_PER_REQUEST_MS", "30000")),
+)
+
+_LIST_BUDGET = DEFAULT_BUDGET._replace(statement_timeout_ms=5000, max_db_time_ms=10000)
+_BULK_BUDGET = DEFAULT_BUDGET._replace(statement_timeout_ms=30000, max_db_time_ms=60000)
+
+# Keyed by the declared route path, prefix included.
+ROUTE_BUDGETS = {
+    # Lists with collection joinedloads and a default limit of 10000
+    "/api/v1/partidos": _LIST_BUDGET,
+    "/api/v1/partidos_externos": _LIST_BUDGET,
+    "/api/v1/eventos": _LIST_BUDGET,
+    "/api/v1/entrenamientos": _LIST_BUDGET,
+    "/api/v1/asistencia": _LIST_BUDGET,
+    "/api/v1/estadisticas_jugador": _LIST_BUDGET,
+    # Set-based writers that legitimately touch many rows
+    "/api/v1/asistencia/bulk": _BULK_BUDGET,
+    "/api/v1/estadisticas_jugador/bulk": _BULK_BUDGET,
+    "/api/v1/crear_o_actualizar_evento/bulk": _BULK_BUDGET,
+    "/api/v1/temporada/entrenamientos": _BULK_BUDGET,
+}
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, state: "RequestBudget", reason: str):
+        super().__init__(f"{state.route}: {reason}")
+        self.state = state
+        self.reason = reason
+
+
+class RequestBudget:
+    """What one request has spent so far; shared by all its transactions."""
+
+    def __init__(self, route: str, params: dict, budget: Budget):
+        self.route = route
+        self.params = params
+        self.budget = budget
+        self.queries = 0
+        self.db_time_ms = 0.0
+
+
+def attach(db, request: Request):
+    """Binds the budget of the matched route to a request's session."""
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    params = {**request.path_params, **request.query_params}
+    db.info[_STATE_KEY] = RequestBudget(path, params, ROUTE_BUDGETS.get(path, DEFAULT_BUDGET))
+
+
+def describe(request: Request) -> str:
+    route = request.scope.get("route")
+    params = {**request.path_params, **request.query_params}
+    return f"{request.method} {getattr(route, 'path', request.url.path)} params={params}"
+
+
+def is_statement_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, DBAPIError) and getattr(exc.orig, "pgcode", None) == QUERY_CANCELED
+
+
+def install(engine, session_factory):
+    if engine.dialect.name == "postgresql":
+        @event.listens_for(engine, "begin")
+        def set_default_timeout(conn):
+            # No transaction to scope a SET LOCAL to (CONCURRENTLY index builds)
+            if conn.get_execution_options().get("isolation_level") == "AUTOCOMMIT":
+                return
+            # Straight on the DBAPI cursor: the Connection is still inside
+            # begin(), and this statement should not count against the budget
+            cursor = conn.connection.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {DEFAULT_BUDGET.statement_timeout_ms}")
+            cursor.close()
+
+    @event.listens_for(engine, "checkin")
+    def forget_request(dbapi_connection, connection_record):
+        connection_record.info.pop(_STATE_KEY, None)
+
+    @event.listens_for(session_factory, "after_begin")
+    def apply_route_budget(session, transaction, connection):
+        state: Optional[RequestBudget] = session.info.get(_STATE_KEY)
+        if state is None:
+            return
+        timeout = state.budget.statement_timeout_ms
+        if timeout != DEFAULT_BUDGET.statement_timeout_ms:
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
+        connection.info[_STATE_KEY] = state
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def check_budget(conn, cursor, statement, parameters, context, executemany):
+        state: Optional[RequestBudget] = conn.info.get(_STATE_KEY)
+        if state is None:
+            return
+        state.queries += 1
+        if state.queries > state.budget.max_queries:
+            raise QueryBudgetExceeded(state, f"more than {state.budget.max_queries} queries")
+        if state.db_time_ms > state.budget.max_db_time_ms:
+            raise QueryBudgetExceeded(
+                state, f"{state.db_time_ms:.0f} ms of DB time (limit {state.budget.max_db_time_ms} ms)"
+            )
+        conn.info[_START_KEY] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def add_db_time(conn, cursor, statement, parameters, context, executemany):
+        state: Optional[RequestBudget] = conn.info.get(_STATE_KEY)
+        start = conn.info.pop(_START_KEY, None)
+        if state is not None and start is not None:
+            state.db_time_ms += (time.perf_counter() - start) * 1000
@@ -0,0 +1,174 @@
+"""
+In-process cache of the reference tables (rivales, Staff, jugadores_propios,
+jugadores_externos): small, read on nearly every screen and during every
+acta import, written a few times a week.
+
+Each table is loaded whole, as plain column rows sorted by its keyset keys,
+and hashed into a version. list_response() and detail_response() then
+answer from memory: filters, offset and cursor pagination, `fields`, the
+ETag (built from that hash, so it changes exactly when the rows do) and the
+304, all without a database round trip.
+
+The routers' create/update/delete handlers call invalidate() right after
+committing, so the next read reloads; writes from other processes arrive
+through utils.change_feed as evict(). An entry also expires after
+REF_CACHE_SECONDS, a safety net for missed notifications. A load racing
+with an invalidation is discarded instead of stored.
+"""
+import bisect
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+from pydantic_core import to_json
+from sqlalchemy import inspect, select
+
+import models_auto as models
+from utils import etag
+from utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from utils.projection import projectable, projection
+from utils.serialization import bytes_response, dump_json
+
+TTL_SECONDS = float(os.getenv("REF_CACHE_SECONDS", "300"))
+
+CACHED_MODELS = (models.Rivales, models.Staff, models.JugadoresPropios, models.JugadoresExternos)
+
+
+def _sort_key(values):
+    # NULLs last, as Postgres sorts them and utils.pagination seeks past them
+    return tuple((value is None, value) for value in values)
+
+
+class TableCache:
+    """One loaded copy of a table."""
+
+    def __init__(self, model, keys: Sequence, rows: List):
+        self.model = model
+        self.keys = keys
+        self.rows = rows
+        self.sort_keys = [_sort_key(getattr(row, key.key) for key in keys) for row in rows]
+        pk = inspect(model).primary_key[0].key
+        self.by_pk = {getattr(row, pk): row for row in rows}
+        self.versions = [(model.__table__.name, hashlib.sha256(repr(rows).encode()).hexdigest())]
+        self.loaded_at = time.monotonic()
+
+    def expired(self) -> bool:
+        return time.monotonic() - self.loaded_at > TTL_SECONDS
+
+
+_entries: Dict[type, TableCache] = {}
+_generations: Dict[type, int] = {model: 0 for model in CACHED_MODELS}
+_locks: Dict[type, threading.Lock] = {model: threading.Lock() for model in CACHED_MODELS}
+
+
+def invalidate(*cached_models):
+    """Drops the cached copy of each model; call after committing a write to it."""
+    for model in cached_models:
+        _generations[model] += 1
+        _entries.pop(model, None)
+
+
+def invalidate_all():
+    invalidate(*CACHED_MODELS)
+
+
+def evict(table_name: str):
+    """Invalidation from another process (utils.change_feed), by table name."""
+    model = next((model for model in CACHED_MODELS if model.__table__.name == table_name), None)
+    if model is not None:
+        invalidate(model)
+
+
+def _load(db, model, keys: Sequence) -> TableCache:
+    generation = _generations[model]
+    columns = [getattr(model, attr.key) for attr in inspect(model).column_attrs]
+    rows = db.execute(select(*columns)).all()
+    # Sorted here rather than with ORDER BY: bisect needs Python's order, not the collation's
+    rows.sort(key=lambda row: _sort_key(getattr(row, key.key) for key in keys))
+    entry = TableCache(model, keys, rows)
+    if _generations[model] == generation:
+        _entries[model] = entry
+    return entry
+
+
+def get(db, model, keys: Sequence) -> TableCache:
+    entry = _entries.get(model)
+    if entry is not None and not entry.expired():
+        return entry
+    with _locks[model]:
+        entry = _entries.get(model)
+        if entry is None or entry.expired():
+            entry = _load(db, model, keys)
+    return entry
+
+
+def _render(model, schema, content) -> bytes:
+    """A list of cached rows as List[schema], or one row as `schema`."""
+    if not projectable(model, schema):
+        raise TypeError(f"{schema.__name__} is not a flat schema of {model.__name__}")
+    many = isinstance(content, list)
+    shape = projection(model, schema)
+    if not shape.direct:
+        return dump_json(List[schema] if many else schema, content)
+
+    def as_dict(row):
+        return dict(zip(shape.names, (getattr(row, column.key) for column in shape.columns)))
+
+    return to_json([as_dict(row) for row in content] if many else as_dict(content))
+
+
+def list_response(
+    db,
+    request: Request,
+    response: Response,
+    model,
+    schema,
+    keys: Sequence,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    filters: Optional[dict] = None,
+) -> Response:
+    """
+    The list handler's answer from memory. `filters` maps model attributes to
+    values compared for equality; empty values are ignored, as in the handlers.
+    """
+    entry = get(db, model, keys)
+    cached = etag.conditional(request, response, etag.make_tag(request, entry.versions))
+    if cached is not None:
+        return cached
+
+    wanted = [(name, value) for name, value in (filters or {}).items() if value]
+    rows, sort_keys = entry.rows, entry.sort_keys
+    if wanted:
+        selected = [i for i, row in enumerate(rows) if all(getattr(row, name) == value for name, value in wanted)]
+        rows, sort_keys = [rows[i] for i in selected], [sort_keys[i] for i in selected]
+
+    if cursor is None:
+        page = rows[skip:skip + limit]
+    else:
+        start = bisect.bisect_right(sort_keys, _sort_key(decode_cursor(cursor, keys))) if cursor else 0
+        page = rows[start:start + limit + 1]
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1], keys)
+            next_url = request.url.include_query_params(cursor=next_cursor)
+            response.headers["Link"] = f'<{next_url}>; rel="next"'
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return bytes_response(_render(model, schema, page), response)
+
+
+def detail_response(
+    db, request: Request, response: Response, model, schema, keys: Sequence, item_id, detail: str = "Item not found"
+) -> Response:
+    entry = get(db, model, keys)
+    cached = etag.conditional(request, response, etag.make_tag(request, entry.versions))
+    if cached is not None:
+        return cached
+    row = entry.by_pk.get(item_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=detail)
+    return bytes_response(_render(model, schema, row), response)
@@ -0,0 +1,47 @@
+"""
+Direct JSON rendering for list endpoints.
+
+json_response() validates the ORM rows once against the response schema
+with a TypeAdapter built the first time each schema is used, and lets
+pydantic-core write the JSON bytes itself. Returning that Response skips
+FastAPI's own response_model pass, which on older releases validated the
+rows, dumped them to Python objects and ran json.dumps on top. The
+response_model stays declared on the route for the OpenAPI schema.
+"""
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+_SKIPPED_HEADERS = (b"content-length", b"content-type")
+
+
+@lru_cache(maxsize=None)
+def adapter(schema) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_json(schema, content: Any) -> bytes:
+    """Same bytes FastAPI would send for `response_model=schema` (by alias)."""
+    type_adapter = adapter(schema)
+    return type_adapter.dump_json(type_adapter.validate_python(content, from_attributes=True), by_alias=True)
+
+
+def json_response(schema, content: Any, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """
+    Renders `content` as `schema`. Headers set on the handler's injected
+    `response` (e.g. the pagination Link) are carried over, since FastAPI
+    ignores them once a handler returns its own Response.
+    """
+    return bytes_response(dump_json(schema, content), response, status_code)
+
+
+def bytes_response(body: bytes, response: Optional[Response] = None, status_code: int = 200) -> Response:
+    """Wraps already rendered JSON; see json_response() for `response`."""
+    rendered = Response(content=body, status_code=status_code, media_type="application/json")
+    if response is not None:
+        rendered.raw_headers.extend(
+            (name, value) for name, value in response.raw_headers if name not in _SKIPPED_HEADERS
+        )
+    return rendered
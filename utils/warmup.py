@@ -0,0 +1,124 @@
+"""
+Warm-up run once per process, before the instance reports ready.
+
+The first requests after a deploy would otherwise pay for opening pooled
+connections (TCP + TLS to Neon), loading the password hashers and jose,
+completing any schema still built lazily, and the first compile of the hot
+list queries. run() does all of that, then sets `warmed` on the health
+monitor so /readyz starts answering 200.
+"""
+import logging
+import os
+import time
+
+import anyio
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "0"))  # 0 = pool size
+# GET endpoints requested in-process once, through the whole middleware
+# stack, to fill utils.ref_cache. Uncached lists (eventos) are left out:
+# a full read whose result is thrown away only delays readiness.
+WARMUP_PATHS = [
+    "/api/v1/rivales",
+    "/api/v1/staff",
+    "/api/v1/jugadores_propios",
+    "/api/v1/jugadores_externos",
+]
+
+
+def open_connections(engine):
+    """Checks out N connections at once so the pool holds N open ones afterwards."""
+    n = WARMUP_CONNECTIONS or getattr(engine.pool, "size", lambda: 1)()
+    connections = []
+    try:
+        for _ in range(n):
+            conn = engine.connect()
+            connections.append(conn)
+            conn.exec_driver_sql("SELECT 1")
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
+def build_serializers():
+    import schemas
+    import schemas_auto
+
+    rebuilt = 0
+    for module in (schemas, schemas_auto):
+        for obj in vars(module).values():
+            if isinstance(obj, type) and issubclass(obj, BaseModel) and obj.__module__ == module.__name__:
+                if not obj.__pydantic_complete__:
+                    obj.model_rebuild()
+                    rebuilt += 1
+    return rebuilt
+
+
+def load_auth():
+    import auth_utils
+
+    context = auth_utils.pwd_context()
+    # New hashes use sha256_crypt; hash + verify is the signup/login path
+    auth_utils.verify_password("warmup", context.hash("warmup"))
+    auth_utils.decode_access_token(auth_utils.create_access_token({"sub": "warmup"}))
+    try:
+        # Older accounts still have bcrypt hashes
+        context.handler("bcrypt").get_backend()
+    except Exception as e:
+        logger.warning(f"Warm-up: bcrypt backend unavailable: {e}")
+    return context.default_scheme()
+
+
+async def get(app, path: str) -> int:
+    """Minimal in-process ASGI GET; returns the status code."""
+    done = anyio.Event()
+    status = 0
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            done.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"warmup")],
+        "client": ("127.0.0.1", 0), "server": ("warmup", 80),
+    }
+    await app(scope, receive, send)
+    return status
+
+
+async def run(app, engine, monitor):
+    start = time.perf_counter()
+    steps = [
+        ("connections", lambda: anyio.to_thread.run_sync(open_connections, engine)),
+        ("serializers", lambda: anyio.to_thread.run_sync(build_serializers)),
+        ("auth", lambda: anyio.to_thread.run_sync(load_auth)),
+    ] + [(path, lambda path=path: get(app, path)) for path in WARMUP_PATHS]
+
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            result = await step()
+            logger.info(f"Warm-up {name}: {result} ({(time.perf_counter() - step_start) * 1000:.0f} ms)")
+        except Exception as e:
+            # Best effort: a failed step only means that cost is paid by a real request
+            logger.warning(f"Warm-up {name} failed: {e}")
+
+    monitor.warmed = True
+    logger.info(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.0f} ms")